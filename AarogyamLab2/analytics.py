@@ -0,0 +1,233 @@
+import os
+import time
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+from firebase_admin import db
+
+import firebase_app
+
+import archive
+import local_mirror
+import patient_search
+
+# ----------------------------
+# ANALYTICS SNAPSHOT (columnar)
+# ----------------------------
+# Month-end reports sathi patients ek da NumPy columns madhe (ek array per field)
+# materialize karto ani .npz file madhe thevto. Group-by queries mag fakt
+# np.bincount / pandas groupby - raw Firebase dicts var loop nahi.
+# Parquet sathi pyarrow lagto (requirement nahi) mhanun .npz.
+
+SNAPSHOT_PATH = os.environ.get(
+    "AAROGYAM_ANALYTICS_SNAPSHOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "analytics_snapshot.npz")
+)
+SNAPSHOT_TTL = 600  # seconds; lagech navin data sathi page var "Rebuild Snapshot" (force)
+NO_DOCTOR = "(none)"
+
+_lock = threading.Lock()
+_cache = {"snapshot": None}
+
+
+def _to_minutes(reg_str):
+    dt = patient_search.parse_registered_on(reg_str)
+    return np.datetime64(dt, "m") if dt else np.datetime64("NaT", "m")
+
+
+def _to_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Snapshot:
+    """Patients as parallel NumPy arrays + exploded (patient, test) arrays."""
+
+    def __init__(self, columns, built_at):
+        self.columns = columns
+        self.built_at = built_at
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def save(self, path=SNAPSHOT_PATH):
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, built_at=np.float64(self.built_at), **self.columns)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        with np.load(path, allow_pickle=False) as z:
+            # "source_version" - junya files madhe hota, aata vaprat nahi
+            columns = {k: z[k] for k in z.files if k not in ("built_at", "source_version")}
+            return cls(columns, float(z["built_at"]))
+
+
+def build_snapshot(patients):
+    """patients: iterable of patient dicts -> Snapshot."""
+    ids, doctors, registered, reported, revenue, n_tests, generated = [], [], [], [], [], [], []
+    n_results = []
+    test_rows, test_names = [], []
+    for pdata in patients:
+        if not isinstance(pdata, dict):
+            continue
+        row = len(ids)
+        ids.append(str(pdata.get("id", "")))
+        doctors.append((pdata.get("doctor") or "").strip() or NO_DOCTOR)
+        registered.append(_to_minutes(pdata.get("registered_on", "")))
+        reported.append(_to_minutes(pdata.get("reported_on", "")))
+        revenue.append(_to_float(pdata.get("total_bill")))
+        generated.append(bool(pdata.get("report_generated")))
+        results = pdata.get("results") or {}
+        n_results.append(sum(1 for k, v in results.items() if "::" in k and not k.endswith("::description")
+                             and str(v.get("value", "") if isinstance(v, dict) else v).strip()))
+        tests = pdata.get("tests") or []
+        n_tests.append(len(tests))
+        test_rows.extend([row] * len(tests))
+        test_names.extend(str(t) for t in tests)
+
+    doctor_names, doctor_codes = np.unique(np.array(doctors, dtype=str), return_inverse=True)
+    test_labels, test_codes = np.unique(np.array(test_names, dtype=str), return_inverse=True)
+    columns = {
+        "id": np.array(ids, dtype=str),
+        "doctor_code": doctor_codes.astype(np.int32),
+        "doctor_names": doctor_names,
+        "registered": np.array(registered, dtype="datetime64[m]"),
+        "reported": np.array(reported, dtype="datetime64[m]"),
+        "revenue": np.array(revenue, dtype=np.float64),
+        "n_tests": np.array(n_tests, dtype=np.int32),
+        "report_generated": np.array(generated, dtype=bool),
+        "n_results": np.array(n_results, dtype=np.int32),
+        "test_row": np.array(test_rows, dtype=np.int64),
+        "test_code": test_codes.astype(np.int32),
+        "test_names": test_labels,
+    }
+    return Snapshot(columns, time.time())
+
+
+def _source_patients():
+    """Patients - mirror sync asel tar SQLite, nahi tar ek Firebase read.
+
+    Archive kelele juna patients pan (archive.py) - month / year reports sathi.
+    """
+    if local_mirror.ready("patients"):
+        return itertools.chain(archive.iter_patients(), local_mirror.iter_patients())
+    rows = db.reference("patients").get() or {}
+    hot = ({**p, "id": pid} for pid, p in rows.items() if isinstance(p, dict))
+    return itertools.chain(archive.iter_patients(), hot)
+
+
+def _fresh(snap):
+    # Fakt TTL: mirror version var rebuild kela tar (pratyek patient write la
+    # badalto) kaamachya veli jawal-jawal pratyek page load la full scan hoil
+    return snap is not None and time.time() - snap.built_at <= SNAPSHOT_TTL
+
+
+def get_snapshot(force=False):
+    """Process cache -> disk .npz -> rebuild (in that order)."""
+    with _lock:
+        snap = _cache["snapshot"]
+        if not force and _fresh(snap):
+            return snap
+        if not force and snap is None and os.path.exists(SNAPSHOT_PATH):
+            try:
+                snap = Snapshot.load()
+            except Exception as e:
+                print(f"⚠️ Analytics snapshot unreadable, rebuilding: {e}")
+                snap = None
+            if _fresh(snap):
+                _cache["snapshot"] = snap
+                return snap
+        snap = build_snapshot(_source_patients())
+        try:
+            snap.save()
+        except OSError as e:
+            print(f"⚠️ Could not save analytics snapshot: {e}")
+        _cache["snapshot"] = snap
+        return snap
+
+
+# ----------------------------
+# QUERIES
+# ----------------------------
+def _day_mask(snap, start=None, end=None):
+    """Registration date start..end (inclusive, datetime.date) mask."""
+    days = snap["registered"].astype("datetime64[D]")
+    mask = ~np.isnat(days)
+    if start:
+        mask &= days >= np.datetime64(start, "D")
+    if end:
+        mask &= days <= np.datetime64(end, "D")
+    return mask
+
+
+def revenue_by_doctor(snap, start=None, end=None):
+    """Doctor-wise patients, tests and revenue (highest revenue first)."""
+    mask = _day_mask(snap, start, end)
+    codes = snap["doctor_code"][mask]
+    size = len(snap["doctor_names"])
+    df = pd.DataFrame({
+        "Doctor": snap["doctor_names"],
+        "Patients": np.bincount(codes, minlength=size),
+        "Tests": np.bincount(codes, weights=snap["n_tests"][mask], minlength=size).astype(np.int64),
+        "Revenue": np.bincount(codes, weights=snap["revenue"][mask], minlength=size),
+    })
+    return df[df["Patients"] > 0].sort_values("Revenue", ascending=False).reset_index(drop=True)
+
+
+def tests_per_day(snap, start=None, end=None):
+    """Date-wise patients, tests and revenue."""
+    mask = _day_mask(snap, start, end)
+    df = pd.DataFrame({
+        "Date": snap["registered"][mask].astype("datetime64[D]"),
+        "Patients": 1,
+        "Tests": snap["n_tests"][mask],
+        "Revenue": snap["revenue"][mask],
+    })
+    return df.groupby("Date", sort=True).sum()
+
+
+def test_counts(snap, start=None, end=None):
+    """Kontya test chi kiti vela order (most ordered first)."""
+    mask = _day_mask(snap, start, end)[snap["test_row"]]
+    counts = np.bincount(snap["test_code"][mask], minlength=len(snap["test_names"]))
+    df = pd.DataFrame({"Test": snap["test_names"], "Count": counts})
+    return df[df["Count"] > 0].sort_values("Count", ascending=False).reset_index(drop=True)
+
+
+def turnaround(snap, start=None, end=None):
+    """Registered -> reported hours per reported patient, and a per-day summary."""
+    mask = _day_mask(snap, start, end) & ~np.isnat(snap["reported"])
+    hours = (snap["reported"][mask] - snap["registered"][mask]).astype(np.int64) / 60.0
+    ok = hours >= 0  # chukicha / juna reported_on vagla
+    days = snap["registered"][mask][ok].astype("datetime64[D]")
+    df = pd.DataFrame({"Date": days, "Hours": hours[ok]})
+    daily = df.groupby("Date")["Hours"].agg(["count", "mean", "median", "max"])
+    return df["Hours"].to_numpy(), daily
+
+
+def summary(snap, start=None, end=None):
+    mask = _day_mask(snap, start, end)
+    hours, _ = turnaround(snap, start, end)
+    return {
+        "patients": int(mask.sum()),
+        "tests": int(snap["n_tests"][mask].sum()),
+        "revenue": float(snap["revenue"][mask].sum()),
+        "pending_reports": int((mask & ~snap["report_generated"]).sum()),
+        "results_entered": int(snap["n_results"][mask].sum()),
+        "median_tat_hours": float(np.median(hours)) if len(hours) else None,
+    }
+
+
+if __name__ == "__main__":
+    firebase_app.init_app()
+    t = time.perf_counter()
+    snap = get_snapshot(force=True)
+    print(f"✅ Snapshot: {len(snap)} patients in {time.perf_counter() - t:.2f}s -> {SNAPSHOT_PATH}")
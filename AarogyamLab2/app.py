@@ -76,6 +76,14 @@ if not st.session_state['logged_in']:
 
 # ------------------ Main App ------------------
 if st.session_state['logged_in']:
+    # Local SQLite mirror fakt ya Streamlit process madhe (idempotent)
+    try:
+        import firebase_app
+        import local_mirror
+        firebase_app.init_app()
+        local_mirror.start()
+    except Exception as e:
+        st.sidebar.warning(f"⚠️ Local mirror not started: {e}")
     st.sidebar.success(f"Logged in as {st.session_state['username']}")
     page = st.sidebar.selectbox("Navigation", ["Dashboard", "Value Entry", "Report Generator"])
 
@@ -0,0 +1,251 @@
+import os
+import gzip
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from firebase_admin import db
+
+import firebase_app
+import day_index
+import patient_search
+
+# ----------------------------
+# COLD ARCHIVE
+# ----------------------------
+# Juna patients (ARCHIVE_AFTER_DAYS peksha juna) Firebase "patients" madhun
+# local archive madhe halavto, mhanje hot tree chhota rahto.
+#   archive/segment-YYYYmmdd-HHMMSS.jsonl.gz - append-only, ek run = ek segment.
+#     Pratyek batch ek gzip member (concatenated gzip = valid .jsonl.gz), mhanun
+#     ek patient vachayla fakt tyacha block decompress.
+#   archive/index.db - SQLite: id, name, phone, registered_key -> (segment, offset, length)
+# Aadhi segment + index disk var (fsync/commit), nantarach Firebase madhun delete -
+# madhe crash zala tar punha chalavla ki same patients punha archive hotat.
+
+ARCHIVE_DIR = os.environ.get(
+    "AAROGYAM_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+)
+ARCHIVE_AFTER_DAYS = int(os.environ.get("AAROGYAM_ARCHIVE_AFTER_DAYS", "365"))
+INDEX_DB = "index.db"
+ARCHIVE_BATCH = 100
+PAGE_SIZE = patient_search.PAGE_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived(
+    id TEXT PRIMARY KEY,
+    name_lower TEXT,
+    phone TEXT,
+    registered_key TEXT,
+    segment TEXT,
+    offset INTEGER,
+    length INTEGER,
+    archived_on TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_archived_registered ON archived(registered_key);
+CREATE INDEX IF NOT EXISTS idx_archived_name ON archived(name_lower);
+CREATE INDEX IF NOT EXISTS idx_archived_phone ON archived(phone);
+"""
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        _conn = sqlite3.connect(os.path.join(ARCHIVE_DIR, INDEX_DB), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def available():
+    """Archive index disk var aahe ka (nasel tar lookups kahi karat nahit)."""
+    return _conn is not None or os.path.exists(os.path.join(ARCHIVE_DIR, INDEX_DB))
+
+
+# ----------------------------
+# WRITE
+# ----------------------------
+def _write_block(f, segment, patients):
+    """Ek gzip member append; index rows return (commit caller karto)."""
+    lines = "".join(json.dumps(p, ensure_ascii=False, sort_keys=True) + "\n" for p in patients)
+    data = gzip.compress(lines.encode("utf-8"))
+    offset = f.tell()
+    f.write(data)
+    f.flush()
+    os.fsync(f.fileno())
+    archived_on = datetime.now().strftime("%Y-%m-%dT%H:%M")
+    return [
+        (p["id"], (p.get("name") or "").lower(), str(p.get("phone") or ""),
+         p.get("registered_key") or "", segment, offset, len(data), archived_on)
+        for p in patients
+    ]
+
+
+def _hot_delete_updates(p):
+    pid = p["id"]
+    updates = {
+        f"{patient_search.PATIENTS_PATH}/{pid}": None,
+        f"{patient_search.INDEX_PATH}/{pid}": None,
+    }
+    day = (p.get("registered_key") or "")[:10]
+    if day:
+        updates[f"{day_index.DAY_INDEX_PATH}/{day}/{pid}"] = None
+    return updates
+
+
+def _oldest_hot(cutoff, limit):
+    return (db.reference(patient_search.PATIENTS_PATH).order_by_child("registered_key")
+            .start_at("0").end_at(cutoff).limit_to_first(limit).get() or {})
+
+
+def archive_older_than(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH, dry_run=False):
+    """Move patients registered more than ``days`` ago into a new archive segment.
+
+    Hot tree madhun registered_key index ne sarvat junya ``batch_size`` patients
+    chi page vachto; archive kelyavar te delete hotat, mhanun pudhchi page parat
+    suruvatipasun. registered_key nasleli records (juna data - patient_search
+    backfill aadhi chalava) vagalli jatat.
+    """
+    cutoff = (date.today() - timedelta(days=days)).isoformat()
+    if dry_run:
+        # patient_index chhota aahe (name + date) - purna records download nahi
+        rows = (db.reference(patient_search.INDEX_PATH).order_by_child("d")
+                .start_at("0").end_at(cutoff).get() or {})
+        print(f"{len(rows)} patients registered before {cutoff} would be archived")
+        return len(rows)
+
+    segment = f"segment-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+    moved = 0
+    with _lock:
+        conn = _connect()
+        with open(os.path.join(ARCHIVE_DIR, segment), "ab") as f:
+            while True:
+                rows = _oldest_hot(cutoff, batch_size)
+                page = [{**p, "id": pid} for pid, p in rows.items() if isinstance(p, dict)]
+                if not page:
+                    break
+                conn.executemany("INSERT OR REPLACE INTO archived VALUES (?,?,?,?,?,?,?,?)",
+                                 _write_block(f, segment, page))
+                conn.commit()
+                updates = {}
+                for p in page:
+                    updates.update(_hot_delete_updates(p))
+                firebase_app.update_many(updates)
+                moved += len(page)
+                print(f"📦 Archived {moved} patients")
+        if not moved:
+            os.remove(os.path.join(ARCHIVE_DIR, segment))
+    print(f"✅ {moved} patients registered before {cutoff} moved to {ARCHIVE_DIR}")
+    return moved
+
+
+# ----------------------------
+# READ
+# ----------------------------
+@lru_cache(maxsize=64)
+def _read_block(segment, offset, length):
+    """{id: patient} for one gzip member (segments append-only -> cache safe)."""
+    with open(os.path.join(ARCHIVE_DIR, segment), "rb") as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    patients = (json.loads(line) for line in data.decode("utf-8").splitlines() if line)
+    return {p["id"]: p for p in patients}
+
+
+def _load(rows):
+    """Index rows (id, segment, offset, length) -> patients in the same order."""
+    out = []
+    for pid, segment, offset, length in rows:
+        p = _read_block(segment, offset, length).get(pid)
+        if p:
+            out.append({**p, "archived": True})
+    return out
+
+
+def get_patient(pid):
+    if not available():
+        return None
+    with _lock:
+        row = _connect().execute(
+            "SELECT id, segment, offset, length FROM archived WHERE id = ?", (pid,)
+        ).fetchone()
+    found = _load([row]) if row else []
+    return found[0] if found else None
+
+
+def search_patients(query="", day=None, limit=PAGE_SIZE, offset=0):
+    """Archived patients newest first -> (patients, next_offset or None).
+
+    ``query`` name substring kiva phone (fakt ankde asel tar); ``day`` = ``datetime.date``.
+    """
+    if not available():
+        return [], None
+    sql = "SELECT id, segment, offset, length FROM archived WHERE 1=1"
+    args = []
+    q = (query or "").strip().lower()
+    if q:
+        column = "phone" if q.isdigit() else "name_lower"
+        sql += f" AND {column} LIKE ?"
+        args.append(f"%{q}%")
+    if day:
+        sql += " AND registered_key LIKE ?"
+        args.append(day.strftime("%Y-%m-%d") + "%")
+    sql += " ORDER BY registered_key DESC LIMIT ? OFFSET ?"
+    args += [limit + 1, offset]
+    with _lock:
+        rows = _connect().execute(sql, args).fetchall()
+    more = len(rows) > limit
+    return _load(rows[:limit]), (offset + limit if more else None)
+
+
+def iter_patients():
+    """Sagle archived patients (stats rebuild / analytics sathi), segment order madhe."""
+    if not available():
+        return
+    with _lock:
+        blocks = _connect().execute(
+            "SELECT DISTINCT segment, offset, length FROM archived ORDER BY segment, offset"
+        ).fetchall()
+        live = {pid: (s, o) for pid, s, o in _conn.execute("SELECT id, segment, offset FROM archived")}
+    for segment, offset, length in blocks:
+        for pid, p in _read_block(segment, offset, length).items():
+            if live.get(pid) == (segment, offset):
+                yield p
+
+
+def count():
+    if not available():
+        return 0
+    with _lock:
+        return _connect().execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old patients from Firebase to the local archive.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive patients older than this many days")
+    parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH, help="Patients per read / archive block")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    parser.add_argument("--find", metavar="NAME_OR_PHONE", help="Search the archive instead of archiving")
+    args = parser.parse_args(argv)
+
+    if args.find is not None:
+        patients, _ = search_patients(args.find, limit=PAGE_SIZE)
+        for p in patients:
+            print(f"{p['id']} | {p.get('name', '')} | {p.get('phone', '')} | {p.get('registered_on', '')}")
+        print(f"{len(patients)} match(es), {count()} archived in total")
+        return 0
+
+    firebase_app.init_app()
+    archive_older_than(args.days, args.batch, dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# ----------------------------
+# REPORT ARTIFACT STORE
+# ----------------------------
+# Report PDF tyachya inputs chya sha256 (patient, results, test definitions,
+# letterhead version, report day) navane persistent folder madhe. Same inputs -> same file,
+# punha render nahi. File vaparli ki mtime touch (LRU); folder budget peksha
+# motha zala ki sarvat juni files delete.
+
+ARTIFACT_DIR = os.environ.get(
+    "AAROGYAM_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+)
+ARTIFACT_BUDGET_MB = int(os.environ.get("AAROGYAM_ARTIFACT_BUDGET_MB", "500"))
+SUFFIX = ".pdf"
+
+# Report content var parinam nasnare / render nantar badalnare fields
+VOLATILE_FIELDS = ("results", "report_generated", "reported_on", "pdf_path")
+
+_lock = threading.Lock()
+_usage = {"bytes": None}
+
+
+def artifact_key(patient_data, results, test_defs, letterhead_version=None, descriptions=None, report_day=None):
+    """sha256 over a canonical JSON of everything that changes the PDF."""
+    patient = {k: v for k, v in (patient_data or {}).items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps(
+        [patient, results or {}, test_defs or {}, letterhead_version or "", descriptions or {}, report_day or ""],
+        sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def path_for(key):
+    return os.path.join(ARTIFACT_DIR, key[:2], key + SUFFIX)
+
+
+def get(key):
+    """Existing artifact path (LRU touch) or None."""
+    path = path_for(key)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def put(key, data):
+    """Atomically store ``data`` under ``key``; returns the path."""
+    path = path_for(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    try:
+        replaced = os.path.getsize(path)  # same key punha lihila - juni size vajaa
+    except OSError:
+        replaced = 0
+    os.replace(tmp, path)
+    with _lock:
+        if _usage["bytes"] is not None:
+            _usage["bytes"] += len(data) - replaced
+        over = _usage["bytes"] is None or _usage["bytes"] > ARTIFACT_BUDGET_MB * 1024 * 1024
+    if over:
+        gc()
+    return path
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _scan():
+    files = []
+    for root, _, names in os.walk(ARTIFACT_DIR):
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+    return files
+
+
+def gc(budget_mb=None):
+    """Delete least recently used artifacts until the folder fits the budget."""
+    budget = (ARTIFACT_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+    with _lock:
+        files = _scan()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        _usage["bytes"] = total
+    if removed:
+        print(f"🧹 Removed {removed} old report artifacts")
+    return removed
+
+
+def stats():
+    files = _scan()
+    oldest = min((m for m, _, _ in files), default=None)
+    return {"files": len(files), "bytes": sum(size for _, size, _ in files),
+            "oldest": time.ctime(oldest) if oldest else None}
+
+
+if __name__ == "__main__":
+    gc()
+    print(stats())
@@ -0,0 +1,151 @@
+import os
+import argparse
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import catalog
+import firebase_app
+import result_codec
+from report_generator import render_report, report_filename, get_letterhead_template, DEFAULT_LETTERHEAD
+
+# ----------------------------
+# BATCH REPORT GENERATION
+# ----------------------------
+BatchResult = namedtuple("BatchResult", ["patient_id", "pdf_bytes", "error"])
+
+# Spawn: worker navin interpreter - parent che threads / locks (Streamlit, mirror
+# streams, report jobs) varsa madhe yet nahit. Sagle platforms var same vartan.
+MP_START_METHOD = os.environ.get("AAROGYAM_MP_START", "spawn")
+
+# Worker process madhe ek da set hota (initializer), pratyek task sathi nahi
+_worker_test_data = {}
+_worker_letterhead = None
+
+
+def _init_worker(test_data, letterhead_path, snapshots=None):
+    global _worker_test_data, _worker_letterhead
+    _worker_test_data = test_data or {}
+    _worker_letterhead = letterhead_path
+    # Compact results che catalog snapshots parent ne vachle - worker Firebase vachat nahi
+    catalog.seed_snapshots(snapshots)
+    try:
+        firebase_app.init_app()  # catalog.get_test fallback (catalog madhun kadhlelya tests) sathi
+    except Exception as e:
+        print(f"⚠️ Report worker without Firebase: {e}")
+    if letterhead_path:
+        # Letterhead ek da parse - worker chya saglya reports sathi
+        get_letterhead_template(letterhead_path)
+
+
+def _render_one(patient):
+    pid = patient.get("id")
+    try:
+        pdf_bytes = render_report(
+            patient, patient.get("results", {}) or {}, patient.get("tests", []),
+            _worker_test_data, letterhead_path=_worker_letterhead
+        )
+        return BatchResult(pid, pdf_bytes, None)
+    except Exception as e:
+        return BatchResult(pid, None, f"{type(e).__name__}: {e}")
+
+
+def generate_reports(patients, test_data, letterhead_path=None, workers=None, start_method=None):
+    """Render many reports, yielding BatchResult as each one completes.
+
+    ``workers`` <= 1 renders serially in this process; otherwise ReportLab
+    rendering fans out across a ProcessPoolExecutor (``start_method``, default
+    ``MP_START_METHOD``)
+    whose workers receive the test catalog, the catalog snapshots the
+    patients' results were saved against and the parsed letterhead once at
+    start-up.
+    """
+    patients = list(patients)
+    if not patients:
+        return
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(patients))
+
+    if workers <= 1:
+        _init_worker(test_data, letterhead_path)
+        for p in patients:
+            yield _render_one(p)
+        return
+
+    versions = {p.get(result_codec.CATALOG_VERSION_FIELD) for p in patients} - {None}
+    snapshots = {v: catalog.get_snapshot(v) for v in versions}
+    snapshots = {v: tests for v, tests in snapshots.items() if tests}
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context(start_method or MP_START_METHOD),
+        initializer=_init_worker, initargs=(test_data, letterhead_path, snapshots)
+    ) as pool:
+        futures = [pool.submit(_render_one, p) for p in patients]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def pending_patients_for_day(patients, day):
+    """Day (dd/mm/YYYY) la register zalele, results aslele pan report pending patients."""
+    pending = []
+    for pid, pdata in (patients or {}).items():
+        if not isinstance(pdata, dict):
+            continue
+        if day not in pdata.get("registered_on", ""):
+            continue
+        if pdata.get("report_generated") or not pdata.get("results"):
+            continue
+        pdata["id"] = pid
+        pending.append(pdata)
+    return pending
+
+
+# ----------------------------
+# CLI: ek divsache sagle pending reports
+# ----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render all pending reports for a day.")
+    parser.add_argument("--date", default=datetime.now().strftime("%d/%m/%Y"), help="DD/MM/YYYY (default: today)")
+    parser.add_argument("--out", default="reports", help="Output folder for PDFs")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-letterhead", action="store_true", help="Render without letterhead")
+    parser.add_argument("--mark-generated", action="store_true", help="Set report_generated/pdf_path in Firebase")
+    args = parser.parse_args(argv)
+
+    from firebase_admin import db
+    firebase_app.init_app()
+
+    patients = pending_patients_for_day(db.reference("patients").get(), args.date)
+    if not patients:
+        print(f"No pending reports for {args.date}")
+        return 0
+
+    test_data = catalog.get_tests()
+    letterhead_path = None if args.no_letterhead else DEFAULT_LETTERHEAD
+    os.makedirs(args.out, exist_ok=True)
+    by_id = {p["id"]: p for p in patients}
+    reported_on = datetime.now().strftime("%d/%m/%Y %I:%M %p")
+
+    failed = 0
+    for res in generate_reports(patients, test_data, letterhead_path, workers=args.workers):
+        if res.error:
+            failed += 1
+            print(f"❌ {res.patient_id}: {res.error}")
+            continue
+        out_path = os.path.join(args.out, report_filename(by_id[res.patient_id]))
+        with open(out_path, "wb") as f:
+            f.write(res.pdf_bytes)
+        if args.mark_generated:
+            db.reference(f"patients/{res.patient_id}").update({
+                "report_generated": True,
+                "pdf_path": os.path.abspath(out_path),
+                "reported_on": reported_on
+            })
+        print(f"✅ {out_path}")
+
+    print(f"Done: {len(patients) - failed} ok, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+import sys
+import copy
+import types
+import threading
+import itertools
+
+# ----------------------------
+# IN-MEMORY firebase_admin.db
+# ----------------------------
+# Benchmarks Firebase / credentials shivay chalavnyasathi: app modules je
+# firebase_admin.db API vaprtat (reference, get/set/update/delete, transaction,
+# order_by_* queries, shallow get, listen) te ek Python dict var. install() app
+# modules import honyadhi call kara - `from firebase_admin import db` ha stand-in gheto.
+# Reads deep copy parat detat (real client pratyek read la navin JSON parse karto).
+
+_lock = threading.RLock()
+_root = {}
+_push_ids = itertools.count()
+
+
+def _parts(path):
+    return [p for p in (path or "").split("/") if p]
+
+
+def _lookup(parts):
+    node = _root
+    for p in parts:
+        if not isinstance(node, dict) or p not in node:
+            return None
+        node = node[p]
+    return node
+
+
+def _store(parts, value):
+    """Firebase semantics: None / {} delete karto, rikame parents kadhun takto."""
+    if isinstance(value, dict):
+        value = {k: v for k, v in value.items() if v is not None} or None
+    if not parts:
+        _root.clear()
+        _root.update(copy.deepcopy(value) or {})
+        return
+    trail, node = [], _root
+    for p in parts[:-1]:
+        child = node.get(p)
+        if not isinstance(child, dict):
+            if value is None:
+                return
+            child = node[p] = {}
+        trail.append((node, p))
+        node = child
+    if value is None:
+        node.pop(parts[-1], None)
+        for parent, key in reversed(trail):
+            if parent[key]:
+                break
+            parent.pop(key)
+    else:
+        node[parts[-1]] = copy.deepcopy(value)
+
+
+class Event:
+    def __init__(self, event_type, path, data):
+        self.event_type, self.path, self.data = event_type, path, data
+
+
+class ListenerRegistration:
+    def close(self):
+        pass
+
+
+class Query:
+    def __init__(self, ref, order):
+        self._ref, self._order = ref, order
+        self._start = self._end = self._first = self._last = None
+
+    def start_at(self, value):
+        self._start = value
+        return self
+
+    def end_at(self, value):
+        self._end = value
+        return self
+
+    def limit_to_first(self, n):
+        self._first = n
+        return self
+
+    def limit_to_last(self, n):
+        self._last = n
+        return self
+
+    def _sort_value(self, key, value):
+        if self._order is None:
+            return key
+        for p in _parts(self._order):
+            value = value.get(p) if isinstance(value, dict) else None
+        return value
+
+    def get(self):
+        data = self._ref.get()
+        if not isinstance(data, dict):
+            return {}
+        rows = []
+        for key, value in data.items():
+            v = self._sort_value(key, value)
+            if v is None and self._order is not None:
+                continue
+            if self._start is not None and str(v) < str(self._start):
+                continue
+            if self._end is not None and str(v) > str(self._end):
+                continue
+            rows.append((str(v), key, value))
+        rows.sort(key=lambda r: (r[0], r[1]))
+        if self._first is not None:
+            rows = rows[:self._first]
+        if self._last is not None:
+            rows = rows[-self._last:]
+        return {key: value for _, key, value in rows}
+
+
+class Reference:
+    def __init__(self, path="/"):
+        self._parts = _parts(path)
+        self.path = "/" + "/".join(self._parts)
+        self.key = self._parts[-1] if self._parts else None
+
+    def child(self, path):
+        return Reference("/".join(self._parts + _parts(path)))
+
+    def get(self, etag=False, shallow=False):
+        with _lock:
+            data = _lookup(self._parts)
+            if shallow and isinstance(data, dict):
+                return {k: True for k in data}
+            return copy.deepcopy(data)
+
+    def set(self, value):
+        with _lock:
+            _store(self._parts, value)
+
+    def update(self, value):
+        with _lock:
+            for path, v in value.items():
+                _store(self._parts + _parts(path), v)
+
+    def delete(self):
+        with _lock:
+            _store(self._parts, None)
+
+    def push(self, value=""):
+        ref = self.child(f"-bench{next(_push_ids):012d}")
+        ref.set(value)
+        return ref
+
+    def transaction(self, transaction_update):
+        with _lock:
+            result = transaction_update(copy.deepcopy(_lookup(self._parts)))
+            _store(self._parts, result)
+            return result
+
+    def listen(self, callback):
+        callback(Event("put", "/", self.get()))
+        return ListenerRegistration()
+
+    def order_by_child(self, path):
+        return Query(self, path)
+
+    def order_by_key(self):
+        return Query(self, None)
+
+
+def reference(path="/", app=None, url=None):
+    return Reference(path)
+
+
+def load(data):
+    """Purna database replace (synthetic data sathi)."""
+    Reference("/").set(data)
+
+
+def install():
+    """firebase_admin.db la ha module lavto (firebase_admin install nasel tar chhota package)."""
+    this = sys.modules[__name__]
+    try:
+        import firebase_admin
+    except ImportError:
+        firebase_admin = types.ModuleType("firebase_admin")
+        firebase_admin._apps = {}
+        firebase_admin.credentials = types.ModuleType("firebase_admin.credentials")
+        sys.modules["firebase_admin"] = firebase_admin
+        sys.modules["firebase_admin.credentials"] = firebase_admin.credentials
+    firebase_admin.db = this
+    sys.modules["firebase_admin.db"] = this
+    return this
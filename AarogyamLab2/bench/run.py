@@ -0,0 +1,227 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+# ----------------------------
+# REPORT GENERATION BENCHMARKS
+# ----------------------------
+# Standalone: Firebase / credentials / Streamlit lagat nahi. memory_db
+# firebase_admin.db chya jagi, synthetic.py data banavto. Pratyek case sathi
+# per-report latency (mean / p50 / p95), throughput ani peak Python memory
+# (tracemalloc) - --save kela ki bench/results.json madhe run jodla jato ani
+# pudhcha run tyachyashi tulana karto (regression = exit code 1).
+#
+#   cd AarogyamLab2 && python bench/run.py --patients 50 --save
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+import memory_db  # noqa: E402
+
+memory_db.install()
+# App modules import honyadhi: artifacts temp madhe, local mirror band
+os.environ.setdefault("AAROGYAM_ARTIFACT_DIR", tempfile.mkdtemp(prefix="aarogyam-bench-artifacts-"))
+os.environ.setdefault("AAROGYAM_MIRROR", "0")
+
+import synthetic  # noqa: E402
+import report_generator  # noqa: E402
+from result_keys import ResultKeyIndex  # noqa: E402
+
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.json")
+LETTERHEAD = os.path.join(APP_DIR, "letterhead(1).pdf")
+WARMUP = 2
+MEMORY_SAMPLE = 10  # peak memory he items var (tracemalloc slow aahe)
+
+
+# ----------------------------
+# CASES
+# ----------------------------
+def _lookups(patient, catalog):
+    """Every (test, sub, param) lookup a report / value_entry makes for one patient."""
+    out = []
+    for test in patient["tests"]:
+        for s in catalog[test]["subtests"]:
+            out.append((test, s["name"], None))
+            out.extend((test, s["name"], p["name"]) for p in s.get("sub_params") or [])
+    return out
+
+
+def build_cases(patients, catalog, work_dir):
+    """{name: (items, fn)} - fn(item) ek report / ek patient che kaam."""
+    def without_letterhead(p):
+        report_generator.generate_report_pdf_without_letterhead(
+            p, p["results"], p["tests"], catalog, output_path=os.path.join(work_dir, "plain.pdf"))
+
+    def in_memory(p):
+        report_generator.render_report(p, p["results"], p["tests"], catalog)
+
+    def with_letterhead(p):
+        report_generator.render_report(p, p["results"], p["tests"], catalog, letterhead_path=LETTERHEAD)
+
+    def merge(path):
+        report_generator.merge_with_letterhead(LETTERHEAD, path, path + ".merged.pdf")
+
+    def find_keys(item):
+        # render_report_bytes sarkha: index ek da build, mag pratyek lookup .find()
+        results, lookups = item
+        index = ResultKeyIndex(results)
+        for test, sub, param in lookups:
+            index.find(test, sub, param)
+
+    def cached(p):
+        report_generator.render_report_cached(p, p["results"], p["tests"], catalog, letterhead_path=LETTERHEAD)
+
+    rendered = []
+    for p in patients:
+        path = os.path.join(work_dir, f"{p['id']}.pdf")
+        report_generator.render_report(p, p["results"], p["tests"], catalog, output_path=path)
+        rendered.append(path)
+    for p in patients:
+        cached(p)  # artifact store bharun - "cached" case fakt hit path mojto
+
+    return {
+        "render_without_letterhead": (patients, without_letterhead),
+        "render_in_memory": (patients, in_memory),
+        "render_with_letterhead": (patients, with_letterhead),
+        "merge_with_letterhead": (rendered, merge),
+        "result_key_index": ([(p["results"], _lookups(p, catalog)) for p in patients], find_keys),
+        "render_cached_hit": (patients, cached),
+    }
+
+
+# ----------------------------
+# MEASURE
+# ----------------------------
+def measure(items, fn, repeat=1):
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        for item in items[:WARMUP]:
+            fn(item)
+        timings = []
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for item in items:
+                t = time.perf_counter()
+                fn(item)
+                timings.append(time.perf_counter() - t)
+        total = time.perf_counter() - started
+
+        tracemalloc.start()
+        for item in items[:MEMORY_SAMPLE]:
+            fn(item)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    ms = sorted(t * 1000 for t in timings)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max_ms": round(ms[-1], 3),
+        "per_sec": round(len(ms) / total, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+# ----------------------------
+# TRACKED RESULTS
+# ----------------------------
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_runs(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("runs", [])
+
+
+def save_run(run, path=RESULTS_PATH):
+    runs = load_runs(path) + [run]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"runs": runs}, f, indent=2)
+        f.write("\n")
+
+
+def compare(cases, baseline, tolerance):
+    """Baseline peksha ``tolerance`` (fraction) peksha jast slow cases."""
+    regressions = []
+    for name, stats in cases.items():
+        base = (baseline.get("cases") or {}).get(name)
+        if base and base["mean_ms"] > 0 and stats["mean_ms"] > base["mean_ms"] * (1 + tolerance):
+            regressions.append((name, base["mean_ms"], stats["mean_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark report generation on synthetic data.")
+    parser.add_argument("--patients", type=int, default=50, help="Synthetic patients (reports) per case")
+    parser.add_argument("--seed", type=int, default=1, help="Synthetic data seed")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed passes over the patients")
+    parser.add_argument("--case", action="append", help="Run only this case (repeatable)")
+    parser.add_argument("--save", action="store_true", help=f"Append this run to {os.path.relpath(RESULTS_PATH)}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs the last saved run")
+    parser.add_argument("--results", default=RESULTS_PATH, help="Tracked results file")
+    args = parser.parse_args(argv)
+
+    data = synthetic.make_database(args.patients, seed=args.seed)
+    memory_db.load(data)
+    patients, catalog = list(data["patients"].values()), data["tests"]
+
+    with tempfile.TemporaryDirectory(prefix="aarogyam-bench-") as work_dir:
+        cases = build_cases(patients, catalog, work_dir)
+        selected = args.case or list(cases)
+        unknown = set(selected) - set(cases)
+        if unknown:
+            parser.error(f"unknown case(s): {', '.join(sorted(unknown))}; choose from {', '.join(cases)}")
+        results = {}
+        print(f"{'case':<28}{'mean ms':>10}{'p50':>10}{'p95':>10}{'per sec':>10}{'peak KB':>10}")
+        for name in selected:
+            items, fn = cases[name]
+            results[name] = stats = measure(items, fn, args.repeat)
+            print(f"{name:<28}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+                  f"{stats['p95_ms']:>10.2f}{stats['per_sec']:>10.1f}{stats['peak_kb']:>10.0f}")
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "patients": args.patients,
+        "seed": args.seed,
+        "cases": results,
+    }
+
+    # Fakt same data (patients, seed) ani same machine / Python varche runs tulana yogya
+    same = ("patients", "seed", "machine", "python")
+    previous = [r for r in load_runs(args.results) if all(r.get(k) == run[k] for k in same)]
+    regressions = compare(results, previous[-1], args.tolerance) if previous else []
+    for name, before, now in regressions:
+        print(f"❌ {name}: {before:.2f} ms -> {now:.2f} ms (> {args.tolerance:.0%} slower than {previous[-1]['commit']})")
+    if previous and not regressions:
+        print(f"✅ No regressions vs {previous[-1]['commit']} ({previous[-1]['timestamp']})")
+    if args.save:
+        save_run(run, args.results)
+        print(f"✅ Saved to {args.results}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+import random
+from datetime import datetime, timedelta
+
+from result_keys import result_key
+
+# ----------------------------
+# SYNTHETIC CATALOG + PATIENTS
+# ----------------------------
+# Benchmarks sathi real sarkha data: chhote panels (3-6 parameters) pasun
+# 30-parameter CBC (DLC sub-params sakat) paryant, patient la 1-10 tests.
+# Seed dila ki pratyek run la same data -> runs madhe tulana karta yete.
+
+CATEGORIES = ("HEMATOLOGY", "BIOCHEMISTRY", "CLINICAL PATHOLOGY", "SEROLOGY")
+UNITS = ("g/dL", "mg/dL", "%", "cells/cumm", "mmol/L", "IU/L", "")
+DOCTORS = ("Dr. A. Patil", "Dr. S. Kulkarni", "Dr. R. Deshmukh", "Self")
+NAMES = ("Ram", "Sita", "Amit", "Priya", "Suresh", "Anita", "Vijay", "Kavita", "Rahul", "Sneha")
+SURNAMES = ("Patil", "Jadhav", "Shinde", "Pawar", "Kale", "More", "Joshi")
+TEXT_OPTIONS = "Absent, Present, Trace, Nil"
+
+
+def _range(rng):
+    low = round(rng.uniform(0.5, 100), 1)
+    return low, round(low * rng.uniform(1.3, 3.0), 1)
+
+
+def _subtest(rng, name, gendered=False):
+    low, high = _range(rng)
+    text = f"{low} - {high}"
+    if gendered:
+        text = f"M: {low} - {high} F: {round(low * 0.9, 1)} - {round(high * 0.9, 1)}"
+    return {"name": name, "unit": rng.choice(UNITS), "range": text}
+
+
+def cbc(rng):
+    """30 parameters: 26 flat + DLC with 4 sub-params."""
+    subtests = [_subtest(rng, f"CBC Parameter {i + 1}", gendered=i < 3) for i in range(26)]
+    dlc = {"name": "Differential Leucocyte Count", "unit": "", "range": "", "sub_params": [
+        {"name": n, "unit": "%", "range": r} for n, r in
+        (("Neutrophils", "40 - 70"), ("Lymphocytes", "20 - 40"), ("Monocytes", "2 - 8"), ("Eosinophils", "1 - 6"))
+    ]}
+    return {"price": 350, "subtests": subtests + [dlc]}
+
+
+def panel(rng, name, size):
+    subtests = [_subtest(rng, f"{name} Item {i + 1}") for i in range(size)]
+    if rng.random() < 0.2:
+        subtests.append({"name": "Appearance", "unit": "", "range": "", "sub_params": [
+            {"name": "Colour", "unit": "", "range": "", "options": TEXT_OPTIONS},
+        ]})
+    return {"price": rng.choice((100, 150, 200, 300, 500)), "subtests": subtests}
+
+
+def make_catalog(n_panels=40, seed=1):
+    """{test name: definition} - CBC + ``n_panels`` panels of 3-12 parameters."""
+    rng = random.Random(seed)
+    tests = {"CBC": cbc(rng)}
+    for i in range(n_panels):
+        name = f"Panel {i + 1:02d}"
+        tests[name] = panel(rng, name, rng.randint(3, 6) if i % 4 else rng.randint(8, 12))
+    return dict(sorted(tests.items()))
+
+
+def _value(rng, definition):
+    if definition.get("options"):
+        return rng.choice([o.strip() for o in definition["options"].split(",")])
+    if not definition.get("range"):
+        return rng.choice(("Normal", "Clear", "Not seen"))
+    first = definition["range"].split("F:")[0].replace("M:", "")
+    low, high = (float(x) for x in first.split("-"))
+    return f"{rng.uniform(low * 0.7, high * 1.3):.1f}"
+
+
+def make_results(rng, tests, catalog, legacy=False):
+    """Results dict the way value_entry saves it (compact, or legacy dicts)."""
+    results = {}
+    for test in tests:
+        results[f"category_{test}"] = rng.choice(CATEGORIES)
+        for s in catalog[test]["subtests"]:
+            params = s.get("sub_params") or []
+            targets = [(s, None)] if not params else [(p, p["name"]) for p in params]
+            for definition, pname in targets:
+                value = _value(rng, definition)
+                key = result_key(test, s["name"], pname)
+                results[key] = ({"value": value, "unit": definition.get("unit", ""),
+                                 "range": definition.get("range", "")} if legacy else value)
+        if rng.random() < 0.3:
+            results[f"{test}::description"] = "Sample slightly hemolysed. Correlate clinically."
+    return results
+
+
+def make_patients(n, catalog, seed=1, max_tests=10, start=None):
+    """{pid: patient} with 1..``max_tests`` tests each (CBC in about half)."""
+    rng = random.Random(seed)
+    start = start or datetime(2026, 1, 1, 8, 0)
+    names = [t for t in catalog if t != "CBC"]
+    patients = {}
+    for i in range(n):
+        k = rng.randint(1, max_tests)
+        tests = rng.sample(names, k - 1) + ["CBC"] if rng.random() < 0.5 else rng.sample(names, k)
+        registered = start + timedelta(minutes=7 * i)
+        gender = rng.choice(("Male", "Female"))
+        name = f"{'Mr.' if gender == 'Male' else 'Mrs.'} {rng.choice(NAMES)} {rng.choice(SURNAMES)}"
+        pid = f"{name.split(' ', 1)[1].replace(' ', '_')}_{registered.strftime('%Y%m%d%H%M%S')}"
+        patients[pid] = {
+            "id": pid,
+            "name": name,
+            "age": f"{rng.randint(1, 90)} Years",
+            "gender": gender,
+            "phone": f"98{rng.randint(0, 10 ** 8 - 1):08d}",
+            "doctor": rng.choice(DOCTORS),
+            "tests": tests,
+            "total_bill": sum(catalog[t]["price"] for t in tests),
+            "sample_collected": "Inside Lab",
+            "registered_on": registered.strftime("%d/%m/%Y %I:%M %p"),
+            "registered_key": registered.strftime("%Y-%m-%dT%H:%M"),
+            "report_generated": False,
+            "reported_on": "",
+            "pdf_path": "",
+            "results": make_results(rng, tests, catalog, legacy=i % 5 == 0),
+        }
+    return patients
+
+
+def make_database(n_patients=200, seed=1):
+    """Purna Firebase tree (memory_db.load() sathi)."""
+    catalog = make_catalog(seed=seed)
+    return {
+        "tests": catalog,
+        "meta": {"tests_version": 1},
+        "patients": make_patients(n_patients, catalog, seed=seed),
+        "doctors": {f"d{i}": {"name": d, "qualification": "MBBS"} for i, d in enumerate(DOCTORS)},
+    }
@@ -0,0 +1,104 @@
+import io
+import os
+import csv
+import zipfile
+import tempfile
+
+from batch_reports import generate_reports, DEFAULT_LETTERHEAD
+from report_generator import report_filename, report_artifact_key
+import artifact_store
+from result_keys import make_key_safe
+
+# ----------------------------
+# BULK PDF EXPORT (ZIP)
+# ----------------------------
+# Doctor / date range che sagle reports ek ZIP madhe. Archive spooled temp file
+# madhe lihila jato - SPOOL_MAX_BYTES paryant memory, tyapudhe disk - ani
+# pratyek PDF tayar hotach ZIP madhe jato (sagle bytes ekatra RAM madhe nahi).
+# Inputs same aslele reports artifact_store madhun thet copy; baki
+# batch_reports ne parallel render ani store madhe thevle jatat.
+
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+# Streamlit server madhun fork nahi: tyat mirror / report job threads ani
+# locks (letterhead, mirror) chalu astat - child la dharlela lock milu shakto.
+WORKER_START_METHOD = "spawn"
+STATUS_ALL, STATUS_GENERATED, STATUS_PENDING = "all", "generated", "pending"
+INDEX_NAME = "index.csv"
+
+
+def filter_status(patients, status=STATUS_ALL):
+    if status == STATUS_GENERATED:
+        return [p for p in patients if p.get("report_generated")]
+    if status == STATUS_PENDING:
+        return [p for p in patients if not p.get("report_generated")]
+    return list(patients)
+
+
+def _artifact_key(patient, test_data, letterhead_path):
+    return report_artifact_key(patient, patient.get("results", {}) or {}, patient.get("tests", []),
+                               test_data, letterhead_path=letterhead_path)
+
+
+def export_zip(patients, test_data, letterhead_path=DEFAULT_LETTERHEAD, workers=None, progress=None):
+    """Write a ZIP of reports for ``patients``; returns (file object at 0, summary dict).
+
+    ``progress(done, total)`` is called after every report. The archive is
+    a SpooledTemporaryFile, so a large export spills to disk while it is built.
+    """
+    patients = list(patients)
+    total = len(patients)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    index_rows = []
+    summary = {"cached": 0, "rendered": 0, "skipped": 0, "failed": 0}
+    done = 0
+
+    def step(patient, status, detail=""):
+        nonlocal done
+        done += 1
+        summary[status] += 1
+        index_rows.append((patient.get("id", ""), patient.get("name", ""), patient.get("doctor", ""),
+                           patient.get("registered_on", ""), status, detail))
+        if progress:
+            progress(done, total)
+
+    # PDFs already compressed - STORED, CPU vaya nahi
+    with zipfile.ZipFile(spool, "w", compression=zipfile.ZIP_STORED) as zf:
+        to_render, keys = [], {}
+        for p in patients:
+            if not p.get("results"):
+                step(p, "skipped", "no results")
+                continue
+            keys[p["id"]] = _artifact_key(p, test_data, letterhead_path)
+            path = artifact_store.get(keys[p["id"]])
+            if path:
+                zf.write(path, report_filename(p))
+                step(p, "cached", os.path.basename(path))
+            else:
+                to_render.append(p)
+
+        by_id = {p["id"]: p for p in to_render}
+        for res in generate_reports(to_render, test_data, letterhead_path, workers=workers,
+                                    start_method=WORKER_START_METHOD):
+            p = by_id[res.patient_id]
+            if res.error:
+                step(p, "failed", res.error)
+                continue
+            name = report_filename(p)
+            zf.writestr(name, res.pdf_bytes)
+            artifact_store.put(keys[res.patient_id], res.pdf_bytes)
+            step(p, "rendered", name)
+
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["patient_id", "name", "doctor", "registered_on", "status", "detail"])
+        writer.writerows(index_rows)
+        zf.writestr(INDEX_NAME, buf.getvalue())
+
+    spool.seek(0)
+    return spool, summary
+
+
+def zip_filename(start, end, doctor=None):
+    span = start.strftime("%d%m%Y") if start == end else f"{start.strftime('%d%m%Y')}-{end.strftime('%d%m%Y')}"
+    who = f"_{make_key_safe(doctor)}" if doctor else ""
+    return f"Reports_{span}{who}.zip"
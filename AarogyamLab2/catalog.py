@@ -0,0 +1,138 @@
+import time
+import threading
+
+from firebase_admin import db
+
+import local_mirror
+
+# ----------------------------
+# TEST CATALOG CACHE
+# ----------------------------
+# Test catalog mahinyatun kahi vela badalto pan divsatun hajaro vela vachla jato.
+# Process madhe ek copy thevto; TTL sampla ki fakt chhota "meta/tests_version"
+# node check karto ani version badalla tarach purna "tests" node punha download.
+
+CATALOG_TTL = 300  # seconds
+TESTS_PATH = "tests"
+VERSION_PATH = "meta/tests_version"
+# Patient results "catalog_version" ithe point kartat: catalog_snapshots/{version}
+# = tya version chi purna tests copy (immutable) - juna report exactly punha banto.
+SNAPSHOTS_PATH = "catalog_snapshots"
+
+_lock = threading.Lock()
+_cache = {"tests": None, "version": None, "checked_at": 0.0}
+_snapshots = {}  # version -> tests (immutable, process bhar)
+
+
+def _remote_version():
+    return db.reference(VERSION_PATH).get() or 0
+
+
+def _bump_version():
+    db.reference(VERSION_PATH).transaction(lambda current: (current or 0) + 1)
+
+
+def get_tests(force=False):
+    """All tests as a name-sorted dict. Shared object - treat as read-only."""
+    if not force and local_mirror.ready(TESTS_PATH):
+        return local_mirror.get_tests()  # listen() stream mule nehmi fresh
+    with _lock:
+        now = time.monotonic()
+        tests = _cache["tests"]
+        if not force and tests is not None and now - _cache["checked_at"] < CATALOG_TTL:
+            return tests
+
+        version = _remote_version()
+        if not force and tests is not None and version == _cache["version"]:
+            _cache["checked_at"] = now
+            return tests
+
+        raw = db.reference(TESTS_PATH).get() or {}
+        tests = dict(sorted(raw.items(), key=lambda x: x[0]))
+        _cache.update(tests=tests, version=version, checked_at=now)
+        return tests
+
+
+def get_test(name):
+    return get_tests().get(name)
+
+
+def get_version():
+    tests = get_tests()
+    with _lock:
+        if _cache["tests"] is tests and _cache["version"] is not None:
+            return _cache["version"]
+    return _remote_version()  # mirror madhun tests - version vegla vacha
+
+
+# ----------------------------
+# VERSIONED SNAPSHOTS
+# ----------------------------
+def _remote_catalog():
+    """(version, tests) donhi Firebase madhun - mirror lag asla tari ekmekanshi match.
+
+    Tests vachtana version badalla (dusra save) tar punha vachto.
+    """
+    while True:
+        version = _remote_version()
+        raw = db.reference(TESTS_PATH).get() or {}
+        if _remote_version() == version:
+            return version, dict(sorted(raw.items(), key=lambda x: x[0]))
+
+
+def _write_snapshot():
+    """catalog_snapshots/{current version} Firebase chya tests varun; version return."""
+    version, tests = _remote_catalog()
+    db.reference(f"{SNAPSHOTS_PATH}/{version}").set(tests)
+    _snapshots[version] = tests
+    return version
+
+
+def snapshot_version():
+    """Current catalog version, making sure catalog_snapshots/{version} exists."""
+    version = get_version()
+    if version in _snapshots:
+        return version
+    if db.reference(f"{SNAPSHOTS_PATH}/{version}").get(shallow=True) is None:
+        return _write_snapshot()  # save_test aadhicha version (snapshot nahi)
+    get_snapshot(version)
+    return version
+
+
+def get_snapshot(version):
+    """Tests as they were at ``version`` (None if that snapshot is missing)."""
+    if version is None:
+        return None
+    tests = _snapshots.get(version)
+    if tests is None:
+        tests = db.reference(f"{SNAPSHOTS_PATH}/{version}").get()
+        if tests:
+            _snapshots[version] = tests
+    return tests
+
+
+def seed_snapshots(snapshots):
+    """Parent process ne vachlele {version: tests} (report worker processes sathi)."""
+    _snapshots.update(snapshots or {})
+
+
+def invalidate():
+    """Local cache clear - next get_tests() re-downloads."""
+    with _lock:
+        _cache.update(tests=None, version=None, checked_at=0.0)
+
+
+def save_test(name, data):
+    db.reference(TESTS_PATH).child(name).set(data)
+    local_mirror.apply_update({f"{TESTS_PATH}/{name}": data})  # listen event chi vaat nahi
+    _bump_version()
+    _write_snapshot()
+    invalidate()
+
+
+def delete_test(name):
+    db.reference(TESTS_PATH).child(name).delete()
+    local_mirror.apply_update({f"{TESTS_PATH}/{name}": None})
+    _bump_version()
+    _write_snapshot()
+    invalidate()
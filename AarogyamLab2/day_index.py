@@ -0,0 +1,122 @@
+import argparse
+
+from firebase_admin import db
+
+import firebase_app
+import patient_search
+import stats
+
+# ----------------------------
+# PATIENTS BY DAY
+# ----------------------------
+# Patient save barobar (same multi-path update) ek chhoti summary:
+#   patients_by_day/{YYYY-MM-DD}/{pid}: {name, age, gender, doctor, tests, ...}
+# "Today's patients" sarkhe daily views fakt ek node vachtat - purna tree /
+# query nahi. Registration date badalli tar juna day entry kadhun takto.
+# Juna data: migrate() (resumable, batched) ek da chalava; to purna hoi paryant
+# daily views patient_search var fallback kartat.
+
+DAY_INDEX_PATH = "patients_by_day"
+MIGRATION_PATH = "meta/day_index_migration"
+PATIENTS_PATH = "patients"
+SUMMARY_FIELDS = ("name", "age", "gender", "phone", "doctor", "tests", "total_bill",
+                  "sample_collected", "registered_on", "registered_key")
+MIGRATION_BATCH = 200
+
+_state = {"migrated": False}
+
+
+def summary(pdata):
+    out = {k: pdata[k] for k in SUMMARY_FIELDS if pdata.get(k) is not None}
+    out["registered_key"] = pdata.get("registered_key") or patient_search.registered_key(pdata.get("registered_on", ""))
+    return out
+
+
+def index_updates(pid, pdata, old=None):
+    """Root multi-path update sathi paths (``old`` = edit adhicha data)."""
+    updates = {}
+    day = stats.patient_day(pdata)
+    old_day = stats.patient_day(old) if old else ""
+    if old_day and old_day != day:
+        updates[f"{DAY_INDEX_PATH}/{old_day}/{pid}"] = None
+    if day:
+        updates[f"{DAY_INDEX_PATH}/{day}/{pid}"] = summary(pdata)
+    return updates
+
+
+# ----------------------------
+# READ
+# ----------------------------
+def migrated():
+    """True once migrate() has backfilled every existing patient."""
+    if not _state["migrated"]:
+        status = db.reference(MIGRATION_PATH).get() or {}
+        _state["migrated"] = bool(status.get("done"))
+    return _state["migrated"]
+
+
+def patients_on_day(day):
+    """Patients registered on ``day`` (``datetime.date``), newest first.
+
+    Ek node read. None jar index ajun migrate zala nahi (caller fallback karto).
+    """
+    if not migrated():
+        return None
+    rows = db.reference(f"{DAY_INDEX_PATH}/{day.isoformat()}").get() or {}
+    patients = [dict(p, id=pid) for pid, p in rows.items() if isinstance(p, dict)]
+    patients.sort(key=lambda p: p.get("registered_key") or "", reverse=True)
+    return patients
+
+
+# ----------------------------
+# MIGRATION (juna data sathi ek da)
+# ----------------------------
+def migrate(batch_size=MIGRATION_BATCH, restart=False):
+    """Backfill patients_by_day from "patients", ``batch_size`` patients per read.
+
+    Key order ne pages vachto (order_by_key + limit_to_first), ek purna tree
+    download nahi. Pratyek batch che index entries ani cursor ekach update madhe
+    lihile jatat - madhe thambla tar punha chalavla ki ithunach pudhe jato.
+    Navin save path deploy zalyavar chalava.
+    """
+    status = {} if restart else (db.reference(MIGRATION_PATH).get() or {})
+    cursor = status.get("cursor") or ""
+    count = status.get("migrated") or 0
+    total = len(firebase_app.get_keys(PATIENTS_PATH))  # shallow - fakt keys, progress sathi
+
+    while True:
+        query = db.reference(PATIENTS_PATH).order_by_key()
+        if cursor:
+            query = query.start_at(cursor)
+        rows = query.limit_to_first(batch_size + 1).get() or {}
+        page = [(pid, p) for pid, p in rows.items() if pid != cursor][:batch_size]
+        if not page:
+            break
+        updates = {}
+        for pid, pdata in page:
+            if isinstance(pdata, dict):
+                updates.update(index_updates(pid, pdata))
+        cursor, count = page[-1][0], count + len(page)
+        updates[MIGRATION_PATH] = {"cursor": cursor, "migrated": count, "done": False}
+        db.reference().update(updates)
+        print(f"✅ {count}/{total} patients indexed by day")
+
+    db.reference(MIGRATION_PATH).set({"cursor": cursor, "migrated": count, "done": True})
+    _state["migrated"] = True
+    print(f"✅ Day index migration complete ({count} patients)")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill patients_by_day for existing patients.")
+    parser.add_argument("--batch", type=int, default=MIGRATION_BATCH, help="Patients per read/write batch")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start from the first patient")
+    args = parser.parse_args(argv)
+
+    firebase_app.init_app()
+    migrate(batch_size=args.batch, restart=args.restart)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
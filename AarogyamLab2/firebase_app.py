@@ -0,0 +1,103 @@
+import os
+import json
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import firebase_admin
+from firebase_admin import credentials, db
+
+# ----------------------------
+# FIREBASE APP (ek jagi init)
+# ----------------------------
+# Sagle pages / modules ithun init_app() kartat. Credentials: FIREBASE_ADMIN_SECRET
+# (base64 JSON, cloud) asel tar te, nahi tar service account JSON file (local).
+# Decode + initialize process madhe ek da; Realtime DB cha HTTP session (ani
+# tyacha connection pool) sagle calls share kartat, pratyek call la TLS nahi.
+
+DATABASE_URL = "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com/"
+SECRET_ENV = "FIREBASE_ADMIN_SECRET"
+CREDENTIALS_FILE = os.environ.get(
+    "AAROGYAM_FIREBASE_CREDENTIALS", "aarogyamlab-e37e4-firebase-adminsdk-fbsvc-aeb8d59129.json"
+)
+# Parallel reads (get_many) + listen streams sathi; requests default 10 aahe
+HTTP_POOL_SIZE = int(os.environ.get("AAROGYAM_HTTP_POOL_SIZE", "32"))
+FETCH_WORKERS = 8
+UPDATE_BATCH = 500
+
+_lock = threading.Lock()
+# get_many sathi ek process-wide pool (pratyek call la navin threads nahit)
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="firebase-get")
+
+
+def _credential():
+    secret_b64 = os.environ.get(SECRET_ENV)
+    if secret_b64:
+        return credentials.Certificate(json.loads(base64.b64decode(secret_b64)))
+    if os.path.exists(CREDENTIALS_FILE):
+        return credentials.Certificate(CREDENTIALS_FILE)
+    raise ValueError(f"{SECRET_ENV} env variable not set and {CREDENTIALS_FILE} not found")
+
+
+def _widen_pool():
+    """Realtime DB client chya requests session la motha connection pool (retries same).
+
+    firebase_admin pool size sathi public option det nahi, mhanun he private
+    ``db.reference()._client.session`` vaprto. firebase_admin upgrade madhe te
+    badalla tar kahi badalat nahi (default pool rahto), fakt warning.
+    AAROGYAM_HTTP_POOL_SIZE=0 ne purna band.
+    """
+    if HTTP_POOL_SIZE <= 0:
+        return
+    session = getattr(getattr(db.reference(), "_client", None), "session", None)
+    if not (hasattr(session, "get_adapter") and hasattr(session, "mount")):
+        print("⚠️ Firebase HTTP client layout changed; keeping its default connection pool")
+        return
+    try:
+        from requests.adapters import HTTPAdapter
+        retries = session.get_adapter(DATABASE_URL).max_retries
+        session.mount("https://", HTTPAdapter(
+            pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries
+        ))
+    except Exception as e:
+        print(f"⚠️ Could not resize Firebase HTTP pool: {e}")
+
+
+def init_app():
+    """Initialize the default Firebase app once per process (idempotent)."""
+    if firebase_admin._apps:
+        return firebase_admin.get_app()
+    with _lock:
+        if firebase_admin._apps:
+            return firebase_admin.get_app()
+        app = firebase_admin.initialize_app(_credential(), {"databaseURL": DATABASE_URL})
+        _widen_pool()
+        return app
+
+
+# ----------------------------
+# BATCHED HELPERS
+# ----------------------------
+def get_many(paths):
+    """{path: value} for many small reads, in parallel over the shared pool."""
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return {}
+    if len(paths) == 1:
+        return {paths[0]: db.reference(paths[0]).get()}
+    values = _fetch_pool.map(lambda path: db.reference(path).get(), paths)
+    return dict(zip(paths, values))
+
+
+def get_keys(path):
+    """Child keys of ``path`` without downloading children (shallow read)."""
+    data = db.reference(path).get(shallow=True)
+    return list(data.keys()) if isinstance(data, dict) else []
+
+
+def update_many(updates, batch_size=UPDATE_BATCH):
+    """Root multi-path update; mothe updates ``batch_size`` paths chya tukdyat."""
+    items = list(updates.items())
+    for i in range(0, len(items), batch_size):
+        db.reference().update(dict(items[i:i + batch_size]))
+    return len(items)
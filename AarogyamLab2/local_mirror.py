@@ -0,0 +1,316 @@
+import os
+import json
+import sqlite3
+import threading
+
+from firebase_admin import db
+
+# ----------------------------
+# LOCAL SQLITE MIRROR
+# ----------------------------
+# Firebase "patients", "tests", "doctors" nodes chi local SQLite copy. Pratyek
+# node var ek listen() stream: pahila event purna snapshot (put "/"), nantar fakt
+# badal (put/patch). Pages ready() asel tar ithun vachtat, nahi tar Firebase.
+# start() fakt Streamlit app (app.py) karto - streams non-daemon threads var
+# kadhich sampat nahit. CLIs / workers start karat nahit: ready() False, Firebase.
+
+MIRROR_ENABLED = os.environ.get("AAROGYAM_MIRROR", "1") != "0"
+MIRROR_DB_PATH = os.environ.get(
+    "AAROGYAM_MIRROR_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "aarogyam_mirror.db")
+)
+NODES = ("patients", "tests", "doctors")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients(
+    id TEXT PRIMARY KEY,
+    name_lower TEXT,
+    phone TEXT,
+    doctor TEXT,
+    registered_key TEXT,
+    report_generated INTEGER,
+    total_bill REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_patients_registered ON patients(registered_key);
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(name_lower);
+CREATE INDEX IF NOT EXISTS idx_patients_phone ON patients(phone);
+CREATE INDEX IF NOT EXISTS idx_patients_doctor ON patients(doctor);
+
+CREATE TABLE IF NOT EXISTS results(
+    patient_id TEXT,
+    key TEXT,
+    value TEXT,
+    data TEXT,
+    PRIMARY KEY(patient_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_results_key ON results(key);
+
+CREATE TABLE IF NOT EXISTS tests(name TEXT PRIMARY KEY, price REAL, data TEXT);
+CREATE TABLE IF NOT EXISTS doctors(id TEXT PRIMARY KEY, name TEXT, data TEXT);
+"""
+
+_lock = threading.RLock()
+_conn = None
+_listeners = {}
+_ready = set()
+_versions = {node: 0 for node in NODES}
+_tests_cache = {"version": -1, "tests": None}
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(MIRROR_DB_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        # Juna doctors table (fakt name, qualification) - mirror cache aahe, punha banto
+        columns = [row[1] for row in _conn.execute("PRAGMA table_info(doctors)")]
+        if columns and "data" not in columns:
+            _conn.execute("DROP TABLE doctors")
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _to_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+# ----------------------------
+# ROW WRITERS
+# ----------------------------
+def _write_patient(conn, pid, pdata):
+    conn.execute("DELETE FROM patients WHERE id = ?", (pid,))
+    conn.execute("DELETE FROM results WHERE patient_id = ?", (pid,))
+    if not isinstance(pdata, dict):
+        return
+    pdata = dict(pdata)
+    results = pdata.pop("results", None) or {}
+    conn.execute(
+        "INSERT INTO patients VALUES (?,?,?,?,?,?,?,?)",
+        (pid, (pdata.get("name") or "").lower(), pdata.get("phone", ""), pdata.get("doctor", ""),
+         pdata.get("registered_key", ""), 1 if pdata.get("report_generated") else 0,
+         _to_float(pdata.get("total_bill")), json.dumps(pdata))
+    )
+    if isinstance(results, dict):
+        conn.executemany(
+            "INSERT INTO results VALUES (?,?,?,?)",
+            [(pid, k, str(v.get("value", "")) if isinstance(v, dict) else str(v), json.dumps(v))
+             for k, v in results.items()]
+        )
+
+
+def _write_test(conn, name, tdata):
+    conn.execute("DELETE FROM tests WHERE name = ?", (name,))
+    if isinstance(tdata, dict):
+        conn.execute("INSERT INTO tests VALUES (?,?,?)", (name, _to_float(tdata.get("price")), json.dumps(tdata)))
+
+
+def _write_doctor(conn, doc_id, doc):
+    conn.execute("DELETE FROM doctors WHERE id = ?", (doc_id,))
+    if isinstance(doc, dict):
+        conn.execute("INSERT INTO doctors VALUES (?,?,?)", (doc_id, doc.get("name", ""), json.dumps(doc)))
+
+
+_WRITERS = {"patients": _write_patient, "tests": _write_test, "doctors": _write_doctor}
+_TABLES = {"patients": ("patients", "results"), "tests": ("tests",), "doctors": ("doctors",)}
+
+
+def _read_doc(conn, node, key):
+    if node == "patients":
+        return _patient_from_db(conn, key)
+    if node == "tests":
+        row = conn.execute("SELECT data FROM tests WHERE name = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    row = conn.execute("SELECT data FROM doctors WHERE id = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _set_path(doc, parts, value):
+    """doc madhe nested path la value (None = delete) - Firebase semantics."""
+    if not parts:
+        return value
+    doc = dict(doc) if isinstance(doc, dict) else {}
+    head, rest = parts[0], parts[1:]
+    child = _set_path(doc.get(head), rest, value)
+    if child is None or child == {}:
+        doc.pop(head, None)
+    else:
+        doc[head] = child
+    return doc
+
+
+def _apply(node, path, data, is_patch):
+    """Apply one stream event (or local write) at ``node``/``path``."""
+    parts = [p for p in (path or "/").split("/") if p]
+    write = _WRITERS[node]
+    with _lock:
+        conn = _connect()
+        if not parts and not is_patch:
+            # Purna snapshot
+            for table in _TABLES[node]:
+                conn.execute(f"DELETE FROM {table}")
+            for key, value in (data or {}).items():
+                write(conn, key, value)
+        else:
+            changes = data.items() if is_patch else [("", data)]
+            touched = {}
+            for sub_path, value in changes:
+                full = parts + [p for p in sub_path.split("/") if p]
+                key = full[0]
+                if key not in touched:
+                    touched[key] = _read_doc(conn, node, key)
+                touched[key] = _set_path(touched[key], full[1:], value)
+            for key, doc in touched.items():
+                write(conn, key, doc)
+        conn.commit()
+        _versions[node] += 1
+
+
+def apply_update(updates):
+    """Local multi-path write (root-relative paths) lagech mirror madhe - stream chi vaat nahi."""
+    if not MIRROR_ENABLED or _conn is None:
+        return
+    for path, value in updates.items():
+        parts = [p for p in path.split("/") if p]
+        if parts and parts[0] in _ready:
+            _apply(parts[0], "/".join(parts[1:]), value, is_patch=False)
+
+
+# ----------------------------
+# SYNC (listen streams)
+# ----------------------------
+def _listener(node):
+    def on_event(event):
+        try:
+            _apply(node, event.path, event.data, is_patch=(event.event_type == "patch"))
+            _ready.add(node)
+        except Exception as e:
+            print(f"⚠️ Mirror update failed for {node}{event.path}: {e}")
+    return on_event
+
+
+def start():
+    """Start one listen() stream per node (idempotent)."""
+    if not MIRROR_ENABLED or len(_listeners) == len(NODES):
+        return
+    with _lock:
+        _connect()
+        for node in NODES:
+            if node not in _listeners:
+                try:
+                    _listeners[node] = db.reference(node).listen(_listener(node))
+                except Exception as e:
+                    print(f"⚠️ Mirror listen failed for {node}: {e}")
+
+
+def stop():
+    with _lock:
+        for reg in _listeners.values():
+            reg.close()
+        _listeners.clear()
+        _ready.clear()
+
+
+def ready(node):
+    """True once the initial snapshot of ``node`` is in SQLite (no side effects)."""
+    return MIRROR_ENABLED and node in _ready
+
+
+# ----------------------------
+# READERS
+# ----------------------------
+def _patient_from_db(conn, pid, row=None):
+    if row is None:
+        row = conn.execute("SELECT data FROM patients WHERE id = ?", (pid,)).fetchone()
+        if not row:
+            return None
+        row = row[0]
+    pdata = json.loads(row)
+    results = {k: json.loads(d) for k, d in conn.execute(
+        "SELECT key, data FROM results WHERE patient_id = ?", (pid,))}
+    if results:
+        pdata["results"] = results
+    pdata["id"] = pid
+    return pdata
+
+
+def get_patient(pid):
+    with _lock:
+        return _patient_from_db(_connect(), pid)
+
+
+def get_patients(ids):
+    with _lock:
+        conn = _connect()
+        return [p for p in (_patient_from_db(conn, pid) for pid in ids) if p]
+
+
+def iter_patients():
+    """Sagle patients (results sakat) - analytics snapshot sathi; ek consistent read."""
+    with _lock:
+        conn = _connect()
+        results = {}
+        for pid, key, data in conn.execute("SELECT patient_id, key, data FROM results"):
+            results.setdefault(pid, {})[key] = json.loads(data)
+        rows = conn.execute("SELECT id, data FROM patients").fetchall()
+    for pid, data in rows:
+        pdata = json.loads(data)
+        if pid in results:
+            pdata["results"] = results[pid]
+        pdata["id"] = pid
+        yield pdata
+
+
+def search_patients(name="", day=None, limit=50, offset=0, doctor=None):
+    """Newest first; name substring, optional day (date) and doctor filters."""
+    sql = "SELECT id, data FROM patients WHERE 1=1"
+    args = []
+    if name and name.strip():
+        sql += " AND name_lower LIKE ?"
+        args.append(f"%{name.strip().lower()}%")
+    if day:
+        sql += " AND registered_key LIKE ?"
+        args.append(day.strftime("%Y-%m-%d") + "%")
+    if doctor:
+        sql += " AND doctor = ?"
+        args.append(doctor)
+    sql += " ORDER BY registered_key DESC LIMIT ? OFFSET ?"
+    args += [limit + 1, offset]
+    with _lock:
+        conn = _connect()
+        rows = conn.execute(sql, args).fetchall()
+        patients = [_patient_from_db(conn, pid, data) for pid, data in rows[:limit]]
+    next_offset = offset + limit if len(rows) > limit else None
+    return patients, next_offset
+
+
+def patients_between(start_key, end_key, doctor=None):
+    """registered_key start..end (inclusive prefixes), newest first; optional doctor."""
+    sql = "SELECT id, data FROM patients WHERE registered_key >= ? AND registered_key <= ?"
+    args = [start_key, end_key]
+    if doctor:
+        sql += " AND doctor = ?"
+        args.append(doctor)
+    sql += " ORDER BY registered_key DESC"
+    with _lock:
+        conn = _connect()
+        return [_patient_from_db(conn, pid, data) for pid, data in conn.execute(sql, args).fetchall()]
+
+
+def get_tests():
+    """Name-sorted tests dict, rebuilt only when the tests stream changed."""
+    with _lock:
+        if _tests_cache["version"] != _versions["tests"]:
+            rows = _connect().execute("SELECT name, data FROM tests ORDER BY name").fetchall()
+            _tests_cache.update(version=_versions["tests"], tests={n: json.loads(d) for n, d in rows})
+        return _tests_cache["tests"]
+
+
+def get_doctors():
+    with _lock:
+        rows = _connect().execute("SELECT id, data FROM doctors").fetchall()
+    return {doc_id: json.loads(data) for doc_id, data in rows}
@@ -0,0 +1,87 @@
+import streamlit as st
+import firebase_app
+from datetime import date, datetime
+import analytics
+
+# ===== Login Check =====
+if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
+    st.warning("⚠️ Please login first from app.py")
+    st.stop()
+
+# ===== Initialize Firebase =====
+firebase_app.init_app()
+
+st.set_page_config(page_title="Analytics", layout="wide")
+st.title("📈 Revenue & Workload Analytics")
+
+# ===== Filters =====
+today = date.today()
+col1, col2, col3 = st.columns([2, 2, 1])
+with col1:
+    start = st.date_input("From", today.replace(day=1))
+with col2:
+    end = st.date_input("To", today)
+with col3:
+    st.write("")
+    rebuild = st.button("🔄 Rebuild Snapshot")
+
+try:
+    with st.spinner("Loading analytics snapshot..."):
+        snap = analytics.get_snapshot(force=rebuild)
+except Exception as e:
+    st.error(f"⚠️ Unable to build analytics snapshot: {e}")
+    st.stop()
+
+built = datetime.fromtimestamp(snap.built_at).strftime("%d/%m/%Y %I:%M %p")
+st.caption(f"Snapshot of {len(snap)} patients, built {built}")
+
+# ===== Summary =====
+s = analytics.summary(snap, start, end)
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1: st.metric("Patients", s["patients"])
+with col2: st.metric("Tests", s["tests"])
+with col3: st.metric("Revenue", f"{s['revenue']:,.0f} ₹")
+with col4: st.metric("Pending Reports", s["pending_reports"])
+with col5:
+    tat = s["median_tat_hours"]
+    st.metric("Median Turnaround", f"{tat:.1f} h" if tat is not None else "-")
+
+st.markdown("---")
+tab_doc, tab_day, tab_tests, tab_tat = st.tabs(
+    ["👨‍⚕️ Revenue per Doctor", "📅 Tests per Day", "🧪 Test Mix", "⏱️ Turnaround"]
+)
+
+with tab_doc:
+    df = analytics.revenue_by_doctor(snap, start, end)
+    if df.empty:
+        st.info("No patients in this period.")
+    else:
+        st.bar_chart(df.set_index("Doctor")["Revenue"])
+        st.dataframe(df, use_container_width=True)
+
+with tab_day:
+    df = analytics.tests_per_day(snap, start, end)
+    if df.empty:
+        st.info("No patients in this period.")
+    else:
+        st.line_chart(df[["Patients", "Tests"]])
+        st.bar_chart(df["Revenue"])
+        st.dataframe(df.sort_index(ascending=False), use_container_width=True)
+
+with tab_tests:
+    df = analytics.test_counts(snap, start, end)
+    if df.empty:
+        st.info("No tests in this period.")
+    else:
+        st.bar_chart(df.set_index("Test")["Count"])
+        st.dataframe(df, use_container_width=True)
+
+with tab_tat:
+    hours, daily = analytics.turnaround(snap, start, end)
+    if daily.empty:
+        st.info("No reported patients in this period.")
+    else:
+        st.line_chart(daily[["mean", "median"]])
+        st.dataframe(daily.rename(columns={
+            "count": "Reports", "mean": "Mean (h)", "median": "Median (h)", "max": "Max (h)"
+        }).sort_index(ascending=False), use_container_width=True)
@@ -1,4 +1,8 @@
 import streamlit as st
+from firebase_admin import db
+import firebase_app
+import pandas as pd
+import stats
 
 # -------------------------------
 # Check login status
@@ -7,6 +11,9 @@ if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.warning("⚠️ Please login first from app.py")
     st.stop()
 
+# ===== Initialize Firebase =====
+firebase_app.init_app()
+
 st.set_page_config(page_title="Aarogyam Lab Dashboard", page_icon="🏥", layout="wide")
 st.title("🏥 Aarogyam Lab Dashboard")
 st.write(f"Welcome, **{st.session_state['username']}** 👋")
@@ -22,10 +29,36 @@ menu = st.sidebar.radio("Go to:", [
 
 if menu == "🏠 Dashboard":
     st.subheader("📊 Overall Statistics")
+    # stats/* counters - patient save barobar update hotat (stats.py)
+    try:
+        data = stats.get_dashboard(force=st.button("🔄 Refresh"))
+    except Exception as e:
+        st.error(f"Unable to load statistics: {e}")
+        st.stop()
+    totals, today, month = data["totals"], data["today"], data["month"]
+
     col1, col2, col3 = st.columns(3)
-    with col1: st.metric("Total Patients", "0")
-    with col2: st.metric("Total Tests", "0")
-    with col3: st.metric("Today's Income", "0 ₹")
+    with col1: st.metric("Total Patients", f"{int(totals['patients'])}", f"+{int(today['patients'])} today")
+    with col2: st.metric("Total Tests", f"{int(totals['tests'])}", f"+{int(today['tests'])} today")
+    with col3: st.metric("Today's Income", f"{today['revenue']:,.0f} ₹")
+
+    col1, col2, col3 = st.columns(3)
+    with col1: st.metric("This Month Patients", f"{int(month['patients'])}")
+    with col2: st.metric("This Month Tests", f"{int(month['tests'])}")
+    with col3: st.metric("This Month Income", f"{month['revenue']:,.0f} ₹")
+
+    st.markdown("---")
+    tab_daily, tab_monthly = st.tabs([f"📅 Last {stats.ROLLUP_DAYS} Days", f"🗓️ Last {stats.ROLLUP_MONTHS} Months"])
+    for tab, rows, label in ((tab_daily, data["daily"], "Date"), (tab_monthly, data["monthly"], "Month")):
+        with tab:
+            if not rows:
+                st.info("No data yet.")
+                continue
+            df = pd.DataFrame(rows).rename(columns={
+                "period": label, "patients": "Patients", "tests": "Tests", "revenue": "Income (₹)"
+            }).set_index(label)
+            st.bar_chart(df["Income (₹)"])
+            st.dataframe(df.sort_index(ascending=False), use_container_width=True)
 
 elif menu == "🚪 Logout":
     st.session_state['logged_in'] = False
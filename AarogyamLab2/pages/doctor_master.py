@@ -1,17 +1,15 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import db
+import firebase_app
+import local_mirror
+import reference_data
 
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.warning("⚠️ Please login first from app.py")
     st.stop()
     
 # ===== Initialize Firebase =====
-if not firebase_admin._apps:
-    cred = credentials.Certificate("aarogyamlab-e37e4-firebase-adminsdk-fbsvc-aeb8d59129.json")
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com"
-    })
+firebase_app.init_app()
 
 st.set_page_config(page_title="Doctor Master", layout="wide")
 st.title("👨‍⚕️ Doctor Master")
@@ -47,10 +45,14 @@ if st.button("💾 Save Doctor"):
         if st.session_state.edit_mode and st.session_state.edit_id:
             # Update existing
             ref.child(st.session_state.edit_id).update(doctor_data)
+            local_mirror.apply_update({f"doctors/{st.session_state.edit_id}/{k}": v for k, v in doctor_data.items()})
+            reference_data.invalidate_doctors()
             st.success(f"✅ Doctor '{name}' updated successfully!")
         else:
             # Add new
-            ref.push(doctor_data)
+            new_ref = ref.push(doctor_data)
+            local_mirror.apply_update({f"doctors/{new_ref.key}": doctor_data})
+            reference_data.invalidate_doctors()
             st.success(f"✅ Doctor '{name}' added successfully!")
 
         # 🔁 Reset form (important)
@@ -64,7 +66,7 @@ if st.button("💾 Save Doctor"):
 st.markdown("---")
 st.subheader("🩺 Saved Doctors")
 
-doctors_data = ref.get()
+doctors_data = reference_data.get_doctors()
 if doctors_data:
     for doc_id, doc in doctors_data.items():
         c1, c2, c3 = st.columns([3, 1, 1])
@@ -81,6 +83,8 @@ if doctors_data:
         with c3:
             if st.button("🗑️ Delete", key=f"del_{doc_id}"):
                 ref.child(doc_id).delete()
+                local_mirror.apply_update({f"doctors/{doc_id}": None})
+                reference_data.invalidate_doctors()
                 st.warning(f"🗑️ Doctor '{doc['name']}' deleted.")
                 st.rerun()
 else:
@@ -1,33 +1,92 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import db
+import firebase_app
 from datetime import datetime
 import os
-import json
-import base64
+from patient_search import patients_between, PAGE_SIZE
+import bulk_export
+from report_generator import render_report_cached, mark_report_generated
+import reference_data
 
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.warning("⚠️ Please login first from app.py")
     st.stop()
 
 # ===== Firebase Initialization =====
-if not firebase_admin._apps:
-    firebase_secret_b64 = os.environ.get("FIREBASE_ADMIN_SECRET")
-    if not firebase_secret_b64:
-        raise ValueError("FIREBASE_ADMIN_SECRET env variable not set")
-    
-    firebase_json = json.loads(base64.b64decode(firebase_secret_b64))
-    cred = credentials.Certificate(firebase_json)
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com/"
-    })
+firebase_app.init_app()
 
 st.set_page_config(page_title="Generate Report", layout="wide")
 st.title("📄 Generate Report")
 
-# ===== Load Patients from Firebase =====
-ref = db.reference("patients")
-patients = ref.get() or {}
+# ===== Bulk Export (ZIP) =====
+def drop_bulk_zip():
+    bulk = st.session_state.pop("bulk_zip", None)
+    if bulk:
+        bulk["file"].close()
+
+
+with st.expander("📦 Bulk Export Reports (ZIP)"):
+    today = datetime.now().date()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        date_range = st.date_input("Date Range", (today, today), key="bulk_range")
+    with col2:
+        try:
+            doctor_options = ["All Doctors"] + reference_data.doctor_options()
+        except Exception:
+            doctor_options = ["All Doctors"]
+        bulk_doctor = st.selectbox("Doctor", doctor_options, key="bulk_doctor")
+    with col3:
+        bulk_status = st.radio("Status", ["All", "Generated", "Pending"], horizontal=True, key="bulk_status")
+    bulk_letterhead = st.checkbox("With Letterhead", value=True, key="bulk_letterhead")
+
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        start_day, end_day = date_range
+        doctor_filter = None if bulk_doctor == "All Doctors" else bulk_doctor
+        bulk_key = (start_day, end_day, doctor_filter, bulk_status, bulk_letterhead)
+
+        prepared_now = False
+        if st.button("🗜️ Prepare ZIP"):
+            patients = bulk_export.filter_status(
+                patients_between(start_day, end_day, doctor_filter), bulk_status.lower()
+            )
+            if not patients:
+                st.info("No patients match this filter.")
+            else:
+                bar = st.progress(0.0, text=f"0 / {len(patients)} reports")
+                zip_file, summary = bulk_export.export_zip(
+                    patients, reference_data.get_tests(),
+                    letterhead_path=bulk_export.DEFAULT_LETTERHEAD if bulk_letterhead else None,
+                    progress=lambda done, total: bar.progress(done / total, text=f"{done} / {total} reports")
+                )
+                old = st.session_state.get("bulk_zip")
+                if old:
+                    old["file"].close()
+                st.session_state["bulk_zip"] = {
+                    "key": bulk_key, "file": zip_file, "summary": summary,
+                    "name": bulk_export.zip_filename(start_day, end_day, doctor_filter),
+                }
+                prepared_now = True
+
+        bulk = st.session_state.get("bulk_zip")
+        if bulk and bulk["key"] == bulk_key:
+            s = bulk["summary"]
+            st.caption(f"Reused {s['cached']} • Rendered {s['rendered']} • "
+                       f"Skipped (no results) {s['skipped']} • Failed {s['failed']}")
+            # ZIP fakt user ne magitla tarach vachun browser la (pratyek rerun la nahi);
+            # download nantar session madhun kadhto
+            if prepared_now or st.button("📥 Get ZIP", key="bulk_get"):
+                bulk["file"].seek(0)
+                st.download_button(
+                    label="⬇️ Download ZIP",
+                    data=bulk["file"].read(),
+                    file_name=bulk["name"],
+                    mime="application/zip",
+                    key="bulk_download",
+                    on_click=drop_bulk_zip
+                )
+    else:
+        st.caption("Select a start and end date.")
 
 # ===== Search Section =====
 st.markdown("### 🔍 Search Patients")
@@ -38,35 +97,14 @@ with col1:
 with col2:
     selected_date = st.date_input("Search by Date (Optional)", value=None)
 
-# ===== Convert dict → list and sort newest first =====
-patient_list = []
-for pid, pdata in patients.items():
-    pdata["id"] = pid
-    reg_str = pdata.get("registered_on", "")
-    try:
-        dt = datetime.strptime(reg_str, "%d/%m/%Y %I:%M %p")
-    except:
-        try:
-            dt = datetime.strptime(reg_str, "%d/%m/%Y")
-        except:
-            dt = datetime.min
-    pdata["_parsed_date"] = dt
-    patient_list.append(pdata)
-
-patient_list.sort(key=lambda x: x["_parsed_date"], reverse=True)
-
-# ===== Apply Filters =====
-filtered_patients = []
-for p in patient_list:
-    name_match = search_name.lower() in p.get("name", "").lower() if search_name else True
-    date_match = True
-    if selected_date:
-        try:
-            date_match = (p["_parsed_date"].date() == selected_date)
-        except:
-            date_match = False
-    if name_match and date_match:
-        filtered_patients.append(p)
+# ===== Indexed search (fakt matching rows, newest first) =====
+filter_key = (search_name, selected_date)
+if st.session_state.get("gr_filter") != filter_key:
+    st.session_state["gr_filter"] = filter_key
+    st.session_state["gr_limit"] = PAGE_SIZE
+limit = st.session_state["gr_limit"]
+
+filtered_patients, more_cursor = reference_data.search_patients(search_name, selected_date, limit=limit)
 
 # ===== Show All Patients =====
 if filtered_patients:
@@ -102,7 +140,7 @@ if filtered_patients:
 
             # 📄 Download / Open Report if available
             with col2:
-                pdf_path = p.get("pdf_path", "")
+                pdf_path = st.session_state.get(f"gr_pdf_{p['id']}") or p.get("pdf_path", "")
                 if report_generated and pdf_path and os.path.exists(pdf_path):
                     with open(pdf_path, "rb") as f:
                         st.download_button(
@@ -111,7 +149,22 @@ if filtered_patients:
                             file_name=f"{p.get('name','report')}.pdf",
                             mime="application/pdf"
                         )
+                elif report_generated and p.get("results"):
+                    # Artifact store gc ne PDF kadhla - same inputs varun punha render
+                    if st.button("🔄 Re-create Report PDF", key=f"recreate_{p['id']}"):
+                        with st.spinner("Generating report..."):
+                            pdf_path, _, _ = render_report_cached(
+                                p, p.get("results", {}), p.get("tests", []), reference_data.get_tests(),
+                                letterhead_path=bulk_export.DEFAULT_LETTERHEAD, report_date=p.get("reported_on") or None
+                            )
+                        mark_report_generated(p["id"], pdf_path, p.get("reported_on", ""))
+                        st.session_state[f"gr_pdf_{p['id']}"] = pdf_path
+                        reference_data.invalidate_patients()
+                        st.rerun()
                 else:
                     st.caption("Report not generated yet.")
+    if more_cursor is not None and st.button("⬇️ Load more"):
+        st.session_state["gr_limit"] = limit + PAGE_SIZE
+        st.rerun()
 else:
     st.info("No matching records found.")
@@ -1,8 +1,14 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import db
+import firebase_app
 from datetime import datetime
 import pandas as pd
+import patient_search
+import reference_data
+import local_mirror
+import stats
+import day_index
+import result_history
 
 # ===== Login Check =====
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
@@ -10,23 +16,21 @@ if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.stop()
     
 # ===== Initialize Firebase =====
-if not firebase_admin._apps:
-    try:
-        cred = credentials.Certificate("aarogyamlab-e37e4-firebase-adminsdk-fbsvc-aeb8d59129.json")
-        firebase_admin.initialize_app(cred, {
-            "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com/"
-        })
-    except Exception as e:
-        st.error(f"⚠️ Firebase initialization failed: {e}")
-        st.stop()
+try:
+    firebase_app.init_app()
+except Exception as e:
+    st.error(f"⚠️ Firebase initialization failed: {e}")
+    st.stop()
 
 st.set_page_config(page_title="Patient Entry", layout="wide")
 st.title("🧍‍♂️ Patient Entry / Edit Form")
 
-# ===== Load existing patients =====
+# ===== Find existing patients (indexed search, purna tree nahi) =====
+patients_ref = db.reference("patients")
+edit_search = st.text_input("🔍 Find Existing Patient (name; blank = most recent)")
 try:
-    patients_ref = db.reference("patients")
-    patients = patients_ref.get() or {}
+    found, _ = reference_data.search_patients(edit_search, limit=patient_search.PAGE_SIZE)
+    patients = {p["id"]: p for p in found}
 except Exception as e:
     st.error(f"Unable to load patients from Firebase: {e}")
     patients = {}
@@ -62,17 +66,14 @@ registration_dt = st.text_input(
 
 # ===== Load Doctors =====
 try:
-    doc_ref = db.reference("doctors")
-    doctors = doc_ref.get() or {}
-    doctor_list = [f"{v['name']} ({v['qualification']})" for v in doctors.values()] if isinstance(doctors, dict) else []
+    doctor_list = reference_data.doctor_options()
 except Exception as e:
     st.error(f"Unable to load doctors from Firebase: {e}")
     doctor_list = []
 
 # ===== Load Tests =====
 try:
-    test_ref = db.reference("tests")
-    tests = test_ref.get() or {}
+    tests = reference_data.get_tests()
     test_names = list(tests.keys())
 except Exception as e:
     st.error(f"Unable to load tests from Firebase: {e}")
@@ -160,21 +161,40 @@ def save_or_update_patient(is_update=False):
         "doctor": final_doctor,
         "tests": selected_tests,
         "total_bill": total_bill,
+        # Billing veleche prices (tests order madhe) - receipt reprint sathi
+        "test_prices": [row["Price (₹)"] for row in test_data],
         "sample_collected": sample_collected,
         "registered_on": registration_dt,
         "report_generated": False,
         "reported_on": "",
         "pdf_path": "",
+        "registered_key": patient_search.registered_key(registration_dt),
     }
 
     try:
+        # Patient + search / day / identity indexes ek multi-path update madhe
+        if is_update:
+            pid = selected_patient["id"]
+            updates = {f"patients/{pid}/{k}": v for k, v in patient_data.items()}
+        else:
+            pid = f"{name.replace(' ','_')}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            patient_data["id"] = pid
+            updates = {f"patients/{pid}": patient_data}
+        updates.update(patient_search.index_updates(pid, patient_data))
+        updates.update(day_index.index_updates(pid, patient_data, old=selected_patient if is_update else None))
+        updates.update(result_history.identity_updates(pid, patient_data, old=selected_patient if is_update else None))
+        db.reference().update(updates)
+        local_mirror.apply_update(updates)
+        patient_search.note_saved(pid, patient_data)
+        reference_data.invalidate_patients()
+        try:
+            # Dashboard counters (daily / monthly / totals)
+            stats.record_patient(patient_data, old=selected_patient if is_update else None)
+        except Exception as e:
+            st.warning(f"⚠️ Dashboard stats not updated: {e}")
         if is_update:
-            patients_ref.child(selected_patient["id"]).update(patient_data)
             st.success(f"✅ Patient '{name}' updated successfully!")
         else:
-            unique_id = f"{name.replace(' ','_')}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            patient_data["id"] = unique_id
-            patients_ref.child(unique_id).set(patient_data)
             st.success(f"✅ Patient '{name}' saved successfully!")
     except Exception as e:
         st.error(f"⚠️ Failed to save/update patient: {e}")
@@ -190,20 +210,19 @@ else:
 # ===== View Saved Patients =====
 st.markdown("---")
 st.subheader("📋 Today's Patients (Newest First)")
-if patients:
-    today_str = datetime.now().strftime("%d/%m/%Y")
-    today_patients = {pid:pdata for pid,pdata in patients.items() if today_str in pdata.get("registered_on","")}
-    if today_patients:
-        sorted_patients = sorted(today_patients.items(), key=lambda x:x[1].get("registered_on",""), reverse=True)
-        for pid, pdata in sorted_patients:
-            bill = pdata.get("total_bill",0)
-            with st.expander(f"🧾 {pdata.get('name','')} | {pdata.get('gender','')} | ₹{bill}"):
-                st.write(f"**Age:** {pdata.get('age','')}")
-                st.write(f"**Doctor:** {pdata.get('doctor','')}")
-                st.write(f"**Tests:** {', '.join(pdata.get('tests',[]))}")
-                st.write(f"**Registered On:** {pdata.get('registered_on','')}")
-                st.write(f"**Sample Collected At:** {pdata.get('sample_collected','')}")
-    else:
-        st.info("📅 No patients registered today.")
+try:
+    today_list = reference_data.patients_on_day(datetime.now().date())
+except Exception as e:
+    st.error(f"Unable to load today's patients: {e}")
+    today_list = []
+if today_list:
+    for pdata in today_list:
+        bill = pdata.get("total_bill",0)
+        with st.expander(f"🧾 {pdata.get('name','')} | {pdata.get('gender','')} | ₹{bill}"):
+            st.write(f"**Age:** {pdata.get('age','')}")
+            st.write(f"**Doctor:** {pdata.get('doctor','')}")
+            st.write(f"**Tests:** {', '.join(pdata.get('tests',[]))}")
+            st.write(f"**Registered On:** {pdata.get('registered_on','')}")
+            st.write(f"**Sample Collected At:** {pdata.get('sample_collected','')}")
 else:
-    st.info("No patients found yet.")
+    st.info("📅 No patients registered today.")
@@ -1,14 +1,18 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import db
+import firebase_app
 from datetime import datetime
-import os
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from num2words import num2words
 import pandas as pd
-import tempfile
-from report_generator import generate_report_pdf_with_letterhead, generate_report_pdf_without_letterhead
+import hashlib
+import json
+from report_generator import render_report_cached, DEFAULT_LETTERHEAD
+import reference_data
+from patient_search import patients_between, PAGE_SIZE
+import receipts
+import archive
+import result_history
+from result_keys import canonical
+import matplotlib.pyplot as plt
 
 
 
@@ -18,31 +22,11 @@ if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
 # -------------------------------
 # Firebase Initialization
 # -------------------------------
-if not firebase_admin._apps:
-    cred = credentials.Certificate("aarogyamlab-e37e4-firebase-adminsdk-fbsvc-aeb8d59129.json")
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com"
-    })
+firebase_app.init_app()
 
 st.set_page_config(page_title="Patient History", layout="wide")
 st.title("📜 Patient History")
 
-patients_ref = db.reference("patients")
-
-# -------------------------------
-# Fetch all patients
-# -------------------------------
-patients = patients_ref.get()
-if not patients:
-    st.info("No patients found yet.")
-    st.stop()
-
-# Convert to list
-patients_list = []
-for pid, pdata in patients.items():
-    pdata["id"] = pid
-    patients_list.append(pdata)
-
 # -------------------------------
 # Search Filters
 # -------------------------------
@@ -53,104 +37,19 @@ with col2:
     search_date = st.date_input("📅 Filter by Date (optional)", value=None)
 
 # -------------------------------
-# Filter Logic
-# -------------------------------
-filtered = []
-for p in patients_list:
-    match_name = search_name.lower() in p.get("name", "").lower() if search_name else True
-    match_date = True
-    if search_date:
-        reg_date = p.get("registered_on", "")
-        try:
-            match_date = search_date.strftime("%d/%m/%Y") in reg_date
-        except:
-            pass
-    if match_name and match_date:
-        filtered.append(p)
-
-# Sort by newest registered first
-filtered = sorted(filtered, key=lambda x: x.get("registered_on", ""), reverse=True)
-
-# -------------------------------
-# Receipt Generator
+# Indexed search (newest registered first)
 # -------------------------------
-def generate_receipt(patient_name, age, gender, doctor_name, date_str, tests_list):
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    filepath = tmp_file.name
-
-    c = canvas.Canvas(filepath, pagesize=A4)
-    width, height = A4
-
-    # --- Header ---
-    c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(width/2, height - 60, "Aarogyam Clinical Laboratory")
-
-    c.setFont("Helvetica", 10)
-    c.drawCentredString(width / 2, height - 75, "Near Niltara Hotel, Ichalkaranji, Korochi - 416109")
-    c.drawCentredString(width / 2, height - 90, "Ph: 7875261778 / 7066261778")
-
-    # --- Title ---
-    c.setFont("Helvetica-Bold", 13)
-    c.drawCentredString(width / 2, height - 120, "RECEIPT")
-
-    # --- Patient Info ---
-    c.setFont("Helvetica", 10)
-    y = height - 150
-    c.drawString(60, y, f"Name : {patient_name}")
-    c.drawRightString(width - 60, y, f"Date : {date_str}")
-
-    y -= 18
-    c.drawString(60, y, f"Age / Gender : {age} / {gender}")
-    c.drawRightString(width - 60, y, f"Referred By : {doctor_name}")
-
-    # --- Table Header ---
-    y -= 35
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(60, y, "Tests Carried Out")
-    c.drawRightString(width - 140, y, "Amount (Rs.)")
-    c.line(50, y - 5, width - 50, y - 5)
-
-    # --- Table Content ---
-    c.setFont("Helvetica", 10)
-    y -= 25
-    total = 0
-    for test_name, price in tests_list:
-        try:
-            price_val = float(price)
-        except:
-            price_val = 0
-        c.drawString(60, y, test_name)
-        c.drawRightString(420, y, f"{price_val:.2f}")
-        total += price_val
-        y -= 15
-        if y < 100:
-            c.showPage()
-            y = height - 100
-
-    # --- Total ---
-    c.line(250, y - 5, 420, y - 5)
-    y -= 20
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(60, y, "Total Amount:")
-    c.drawRightString(420, y, f"{total:.2f}")
-
-    # --- Amount in Words ---
-    y -= 35
-    amount_words = num2words(total, lang='en').title()
-    c.setFont("Helvetica", 10)
-    c.drawString(60, y, f"Amount In Words : Rs. {amount_words} Only")
-
-    # --- Footer ---
-    y -= 50
-    c.setFont("Helvetica", 10)
-    c.drawRightString(width - 60, y, "For AAROGYAM CLINICAL LABORATORY")
-    y -= 40
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawCentredString(width / 2, y, "Thank you for visiting!")
-
-    c.save()
-    return filepath
-
+filter_key = (search_name, search_date)
+if st.session_state.get("ph_filter") != filter_key:
+    st.session_state["ph_filter"] = filter_key
+    st.session_state["ph_limit"] = PAGE_SIZE
+limit = st.session_state["ph_limit"]
+
+filtered, more_cursor = reference_data.search_patients(search_name, search_date, limit=limit)
+# Hot tree madhle results sampale ki juna (archived) patients local archive madhun
+if more_cursor is None and len(filtered) < limit:
+    archived, more_cursor = archive.search_patients(search_name, search_date, limit=limit - len(filtered))
+    filtered = filtered + archived
 
 # -------------------------------
 # Table View for Patients
@@ -162,6 +61,8 @@ if filtered:
     for i, p in enumerate(filtered, start=1):
         
         status = "✅ Generated" if p.get("report_generated") else "⏳ Pending"
+        if p.get("archived"):
+            status += " (📦 Archived)"
         df_data.append({
             "Sr No.": i,
             "Name": p.get("name", ""),
@@ -176,57 +77,131 @@ if filtered:
 
     df = pd.DataFrame(df_data)
     st.dataframe(df, use_container_width=True)
+    if more_cursor is not None and st.button("⬇️ Load more"):
+        st.session_state["ph_limit"] = limit + PAGE_SIZE
+        st.rerun()
 
     # Individual action buttons
     st.markdown("---")
     st.subheader("🧾 Actions / Generate PDF")
-    for i, p in enumerate(filtered, start=1):
-        with st.expander(f"{i}. {p.get('name','')}"):
-            # Generate Report with Letterhead
-            tests_ref = db.reference("tests")
-            letterhead_path = os.path.join(os.getcwd(), "letterhead.pdf")
-            pdf_path1 = generate_report_pdf_with_letterhead(
-                letterhead_path,
-                p,
-                p.get("results", {}),
-                p.get("tests", []),
-                tests_ref.get() or {}
+
+    # PDF fakt user ne click kelyavar banto; (patient id, results hash, letterhead) var cache
+    tests_data = reference_data.get_tests()
+    letterhead_path = DEFAULT_LETTERHEAD
+    pdf_cache = st.session_state.setdefault("history_pdf_cache", {})
+    MAX_CACHED_PDFS = 50
+
+    def report_cache_key(p, with_letterhead):
+        results_hash = hashlib.sha1(
+            json.dumps(p.get("results", {}), sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return (p["id"], results_hash, with_letterhead)
+
+    def pdf_download(p, i, with_letterhead):
+        tag = "letterhead" if with_letterhead else "noletter"
+        suffix = "with_letterhead" if with_letterhead else "no_letterhead"
+        label = "With Letterhead" if with_letterhead else "Without Letterhead"
+        cache_key = report_cache_key(p, with_letterhead)
+        if cache_key in pdf_cache:
+            st.download_button(
+                label=f"📥 Download PDF ({label})",
+                data=pdf_cache[cache_key],
+                file_name=f"{p.get('name','report')}_{suffix}.pdf",
+                mime="application/pdf",
+                key=f"dl_{tag}_{i}_{p['id']}"
             )
-            if os.path.exists(pdf_path1):
-                with open(pdf_path1, "rb") as f1:
-                    st.download_button(
-                        label="📥 Download PDF (With Letterhead)",
-                        data=f1.read(),
-                        file_name=f"{p.get('name','report')}_with_letterhead.pdf",
-                        mime="application/pdf",
-                        uique_key=f"letterhead_{i}_{p['id']}"
-                    )
-
-            # Generate Report without Letterhead
-            
-            # tests_data: Dict = tests_ref.get() or {}
-            pdf_path2 = generate_report_pdf_without_letterhead(
-                p,
-                p.get("results", {}),
-                p.get("tests", []),
-                tests_ref.get() or {}
+        elif st.button(f"🧾 Prepare PDF ({label})", key=f"prep_{tag}_{i}_{p['id']}"):
+            with st.spinner("Generating report..."):
+                while len(pdf_cache) >= MAX_CACHED_PDFS:
+                    pdf_cache.pop(next(iter(pdf_cache)))  # oldest entry
+                # Artifact store: inputs same asel tar disk varcha PDF, render nahi
+                _, pdf_cache[cache_key], _ = render_report_cached(
+                    p,
+                    p.get("results", {}),
+                    p.get("tests", []),
+                    tests_data,
+                    letterhead_path=letterhead_path if with_letterhead else None
+                )
+            st.rerun()
+
+    def receipt_download(p, i):
+        # Receipt memory madhe, lagech - button dabla ki download
+        cache_key = ("receipt", p["id"], p.get("total_bill"), tuple(p.get("tests", []) or []))
+        if cache_key in pdf_cache:
+            st.download_button(
+                label="📥 Download Receipt",
+                data=pdf_cache[cache_key],
+                file_name=f"{p.get('name','receipt')}_receipt.pdf",
+                mime="application/pdf",
+                key=f"dl_receipt_{i}_{p['id']}"
             )
-            if os.path.exists(pdf_path2):
-                with open(pdf_path2, "rb") as f2:
-                    st.download_button(
-                        label="📥 Download PDF (Without Letterhead)",
-                        data=f2.read(),
-                        file_name=f"{p.get('name','report')}_no_letterhead.pdf",
-                        mime="application/pdf",
-                        unique_key=f"noletter_{i}_{p['id']}"
-                    )
-
-                # with col4:
-                    # Print Receipt (optional)
-                    if st.button("🧾 Print Receipt", key=f"receipt_{i}"):
-                        st.info("Receipt generation logic can be added here")
-    # else:
-        st.info("No matching records found.")
-
-
-        
\ No newline at end of file
+        elif st.button("🧾 Print Receipt", key=f"receipt_{i}"):
+            while len(pdf_cache) >= MAX_CACHED_PDFS:
+                pdf_cache.pop(next(iter(pdf_cache)))
+            pdf_cache[cache_key] = receipts.render_receipt(p, tests_data)
+            st.rerun()
+
+    # Divsachya saglya receipts ek PDF madhe (ek print job)
+    receipt_day = search_date or datetime.now().date()
+    day_key = ("day_receipts", receipt_day)
+    if st.button(f"🖨️ Print All Receipts for {receipt_day.strftime('%d/%m/%Y')}"):
+        day_patients = list(reversed(
+            patients_between(receipt_day, receipt_day) or archive.search_patients(day=receipt_day, limit=500)[0]
+        ))  # registration order
+        if day_patients:
+            st.session_state["history_day_receipts"] = (day_key, len(day_patients),
+                                                        receipts.render_receipts(day_patients, tests_data))
+        else:
+            st.info("No patients registered on this day.")
+    day_receipts = st.session_state.get("history_day_receipts")
+    if day_receipts and day_receipts[0] == day_key:
+        st.download_button(
+            label=f"📥 Download {day_receipts[1]} Receipts (PDF)",
+            data=day_receipts[2],
+            file_name=f"Receipts_{receipt_day.strftime('%d%m%Y')}.pdf",
+            mime="application/pdf",
+            key="dl_day_receipts"
+        )
+
+    def show_trends(p, i):
+        # Same phone + naav chya saglya visits - ek identity node read
+        try:
+            history = result_history.get_history(p)
+        except Exception as e:
+            st.warning(f"⚠️ Could not load result history: {e}")
+            return
+        series = {k: rows for k, rows in history.items() if len(rows) >= 2}
+        if not series:
+            st.info("No repeated numeric results for this patient (trends need the same phone + name across visits).")
+            return
+        labels = {canonical(k): k.replace("::", " › ").replace("_", " ") for k in (p.get("results") or {})}
+        key = st.selectbox("Parameter", sorted(series, key=lambda k: labels.get(k, k)),
+                           format_func=lambda k: labels.get(k, k), key=f"trend_param_{i}_{p['id']}")
+        rows = series[key]
+        dates = [datetime.strptime(t, "%Y-%m-%dT%H:%M") for t, _, _ in rows]
+        values = [v for _, v, _ in rows]
+        fig, ax = plt.subplots(figsize=(7, 2.8))
+        ax.plot(dates, values, marker="o")
+        current = [(d, v) for d, (_, v, pid) in zip(dates, rows) if pid == p["id"]]
+        if current:
+            ax.plot(*zip(*current), marker="o", color="red", linestyle="", label="This visit")
+            ax.legend(loc="best", fontsize=8)
+        ax.set_title(labels.get(key, key), fontsize=10)
+        ax.grid(alpha=0.3)
+        fig.autofmt_xdate()
+        st.pyplot(fig)
+        plt.close(fig)
+
+    for i, p in enumerate(filtered, start=1):
+        with st.expander(f"{i}. {p.get('name','')}"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                pdf_download(p, i, with_letterhead=True)
+            with col2:
+                pdf_download(p, i, with_letterhead=False)
+            with col3:
+                receipt_download(p, i)
+            if st.checkbox("📈 Result Trends", key=f"trend_{i}_{p['id']}"):
+                show_trends(p, i)
+else:
+    st.info("No matching records found.")
@@ -1,24 +1,19 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+import firebase_app
+from copy import deepcopy
+import catalog
+import reference_data
 
 if 'logged_in' not in st.session_state or not st.session_state['logged_in']:
     st.warning("⚠️ Please login first from app.py")
     st.stop()
 # ========== Firebase Initialization ==========
-if not firebase_admin._apps:
-    cred = credentials.Certificate("aarogyamlab-e37e4-firebase-adminsdk-fbsvc-aeb8d59129.json")
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com"
-    })
+firebase_app.init_app()
 
 st.set_page_config(page_title="Test Master", layout="wide")
 st.title("🧪 Test Master")
 st.caption("Add, Edit, and Delete Laboratory Tests with Sub-tests and Parameters")
 
-# ========== Firebase Reference ==========
-ref = db.reference("tests")
-
 # ========== Session State ==========
 if "edit_mode" not in st.session_state:
     st.session_state.edit_mode = False
@@ -29,9 +24,6 @@ if "subtests" not in st.session_state:
 if "price" not in st.session_state:
     st.session_state.price = 0
 
-# ========== Load Tests ==========
-all_tests = ref.get() or {}
-
 # ======================== TEST FORM ========================
 if st.session_state.edit_mode:
     st.subheader(f"✏️ Editing Test — {st.session_state.editing_test}")
@@ -117,7 +109,8 @@ if st.button("💾 Save Test"):
             "price": price,
             "subtests": st.session_state.subtests
         }
-        ref.child(main_test).set(data)
+        catalog.save_test(main_test, data)
+        reference_data.invalidate_tests()
         st.success(f"✅ '{main_test}' saved successfully!")
 
         # ===== Clear form after save =====
@@ -137,7 +130,7 @@ if st.button("💾 Save Test"):
 st.markdown("---")
 st.subheader("📊 Saved Tests (Click Edit or Delete)")
 
-all_tests = ref.get()
+all_tests = reference_data.get_tests()
 if all_tests:
     for tname, tdata in all_tests.items():
         with st.container(border=True):
@@ -158,12 +151,14 @@ if all_tests:
                 if st.button(f"✏️ Edit {tname}", key=f"edit_{tname}"):
                     st.session_state.edit_mode = True
                     st.session_state.editing_test = tname
-                    st.session_state.subtests = tdata["subtests"]
+                    # Cached catalog shared aahe - edit sathi copy
+                    st.session_state.subtests = deepcopy(tdata.get("subtests", []))
                     st.session_state.price = tdata["price"]
                     st.rerun()
             with col2:
                 if st.button(f"🗑️ Delete {tname}", key=f"delete_{tname}"):
-                    ref.child(tname).delete()
+                    catalog.delete_test(tname)
+                    reference_data.invalidate_tests()
                     st.success(f"🗑️ '{tname}' deleted successfully!")
                     st.rerun()
 else:
@@ -1,36 +1,28 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import db
+import firebase_app
 from datetime import datetime
 import requests
 import os
-import json
-import base64
 from report_generator import (
     generate_report_pdf_with_letterhead,
     generate_report_pdf_without_letterhead, 
-    merge_with_letterhead
+    merge_with_letterhead,
+    render_report,
+    report_filename
 )
 import re
 import urllib.parse
-
-def make_key_safe(key: str) -> str:
-    """Firebase key मध्ये invalid characters replace करते"""
-    import re
-    return re.sub(r'[.$#\[\]/\(\)\s]', '_', key)
-
+import catalog
+import local_mirror
+import reference_data
+import result_codec
+import result_history
+import report_jobs
+from result_keys import ResultKeyIndex, make_key_safe, result_key
 
 # ========== Firebase Init ==========
-if not firebase_admin._apps:
-    firebase_secret_b64 = os.environ.get("FIREBASE_ADMIN_SECRET")
-    if not firebase_secret_b64:
-        raise ValueError("FIREBASE_ADMIN_SECRET env variable not set")
-    
-    firebase_json = json.loads(base64.b64decode(firebase_secret_b64))
-    cred = credentials.Certificate(firebase_json)
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com/"
-    })
+firebase_app.init_app()
 
 st.set_page_config(page_title="Value Entry", layout="wide")
 st.title("🧪 Enter Test Values")
@@ -46,40 +38,23 @@ patient_id = st.session_state["selected_patient_id"]
 # Firebase References
 # ---------------------------
 patients_ref = db.reference("patients")
-tests_ref = db.reference("tests")
 
-patient_data = patients_ref.child(patient_id).get()
+if local_mirror.ready("patients"):
+    patient_data = local_mirror.get_patient(patient_id)
+else:
+    patient_data = patients_ref.child(patient_id).get()
 if not patient_data:
     st.error("❌ Patient not found!")
     st.stop()
 
-test_data = tests_ref.get() or {}
-test_data = dict(sorted(test_data.items(), key=lambda x: x[0]))  # keeps consistent order
+test_data = reference_data.get_tests()  # cached, name-sorted
 
 # ---------------------------
-# Firebase-safe key helper
+# Saved value lookup
 # ---------------------------
-def make_key_safe(name: str):
-    """Firebase-safe key (replace invalid chars)"""
-    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
-
-def get_saved_value(saved_dict, test, sub, param=None):
+def get_saved_value(saved_index, test, sub, param=None):
     """Fetch old value using both original & safe keys"""
-    safe_sub = make_key_safe(sub)
-    if param:
-        safe_param = make_key_safe(param)
-        key1 = f"{test}::{sub}::{param}"
-        key2 = f"{test}::{safe_sub}::{safe_param}"
-    else:
-        key1 = f"{test}::{sub}"
-        key2 = f"{test}::{safe_sub}"
-
-    if key1 in saved_dict:
-        return saved_dict[key1].get("value", "")
-    elif key2 in saved_dict:
-        return saved_dict[key2].get("value", "")
-    else:
-        return ""
+    return result_codec.value_of(saved_index.get(test, sub, param, fuzzy=False))
 
 
 # ---------------------------
@@ -93,8 +68,37 @@ st.write(f"📅 Registered On: {patient_data.get('registered_on','')}")
 # Load existing saved values
 # ---------------------------
 saved_results = patient_data.get("results", {})
+saved_index = ResultKeyIndex(saved_results)
 entered_values = {}
 
+# Same vyakti (phone + naav) chya magil visits - previous value ani delta check.
+# Pratyek rerun la Firebase reads nako: patient sathi session madhe ek da, save nantar clear.
+history_key = f"result_history_{patient_id}"
+identity = result_history.identity_key(patient_data)
+cached_history = st.session_state.get(history_key)
+if cached_history and cached_history[0] == identity:
+    previous_results = cached_history[1]
+else:
+    try:
+        previous_results = result_history.get_history(patient_data)
+        st.session_state[history_key] = (identity, previous_results)
+    except Exception as e:
+        st.warning(f"⚠️ Previous visit results not loaded: {e}")
+        previous_results = {}
+
+
+def show_previous(key, val):
+    prev = result_history.previous(previous_results, key, patient_data, patient_id)
+    if not prev:
+        return
+    visit, prev_val = prev
+    text = f"Prev: {prev_val:g} ({visit[:10]})"
+    change = result_history.delta(val, prev_val)
+    if result_history.is_large_delta(change):
+        st.caption(f":red[⚠️ {text} · Δ {change:+.0%}]")
+    else:
+        st.caption(text)
+
 # ---------------------------
 # Table-Style Value Entry
 # ---------------------------
@@ -110,7 +114,7 @@ for test_name in patient_data.get("tests", []):
         "CLINICAL PATHOLOGY", "SEROLOGY", "URINE EXAMINITION", "EXAMINATION OF BLOOD"
     ]
 
-    prev_cat = saved_results.get(f"category_{test_name}", {}).get("value", "") if saved_results else ""
+    prev_cat = result_codec.value_of(saved_results.get(f"category_{test_name}"))
 
     selected_category = st.selectbox(
         f"Category for {test_name}",
@@ -119,7 +123,7 @@ for test_name in patient_data.get("tests", []):
         key=f"cat_{test_name}"
     )
 
-    entered_values[f"category_{test_name}"] = {"value": "" if selected_category == "-- Select Category --" else selected_category}
+    entered_values[f"category_{test_name}"] = "" if selected_category == "-- Select Category --" else selected_category
 
     st.markdown("---")
     st.markdown(f"## 🧫 {test_name}  (₹{test_info.get('price', 0)})")
@@ -150,7 +154,7 @@ for test_name in patient_data.get("tests", []):
         
 
         with c2:
-            prev_val = get_saved_value(saved_results, test_name, sub_name)
+            prev_val = get_saved_value(saved_index, test_name, sub_name)
             val = st.text_input(
                 label="",
                 key=f"val_{test_name}_{safe_sub_name}",
@@ -158,20 +162,16 @@ for test_name in patient_data.get("tests", []):
                 value=prev_val,
                 label_visibility="collapsed"
             )
+            show_previous(result_key(test_name, sub_name), val)
 
         with c3:
             st.markdown(f"<p style='margin-top:4px'>{sub_unit}</p>", unsafe_allow_html=True)
         with c4:
             st.markdown(f"<p style='margin-top:4px'>{sub_range}</p>", unsafe_allow_html=True)
 
-        safe_sub = make_key_safe(sub_name)
-        key_name = f"{test_name}::{safe_sub}".strip()
-        entered_values[key_name] = {
-            "value": val,
-            "unit": sub_unit,
-            "range": sub_range,
-            "original_name": sub_name  # for report display
-        }
+        # Compact: fakt value; unit / range catalog snapshot madhun (catalog_version)
+        key_name = result_key(test_name, sub_name).strip()
+        entered_values[key_name] = val
         
 
         # --- Sub-Parameters (if any) ---
@@ -182,7 +182,7 @@ for test_name in patient_data.get("tests", []):
             prange = param.get("range", "")
             popts = param.get("options", "")
             safe_p = make_key_safe(pname)
-            # prev_val = get_saved_value(saved_results, test_name, sub_name)
+            # prev_val = get_saved_value(saved_index, test_name, sub_name)
 
             if isinstance(popts, str) and popts.strip():
                 popts = [opt.strip() for opt in popts.split(",")]
@@ -194,7 +194,7 @@ for test_name in patient_data.get("tests", []):
                 st.markdown(f"↳ **{pname}**")
 
             key_name = f"{test_name}::{safe_sub_name}::{safe_pname}"
-            prev_val = get_saved_value(saved_results, test_name, sub_name, pname)
+            prev_val = get_saved_value(saved_index, test_name, sub_name, pname)
 
             with c2:
                 if popts:
@@ -224,21 +224,15 @@ for test_name in patient_data.get("tests", []):
                         value=prev_val,
                         label_visibility="collapsed",
                     )
+                show_previous(result_key(test_name, sub_name, pname), val)
 
             with c3:
                 st.markdown(f"<p style='margin-top:4px'>{punit}</p>", unsafe_allow_html=True)
             with c4:
                 st.markdown(f"<p style='margin-top:4px'>{prange}</p>", unsafe_allow_html=True)
 
-            safe_sub = make_key_safe(sub_name)
-            safe_p = make_key_safe(pname)
-            key_name = f"{test_name}::{safe_sub}::{safe_p}".strip()
-            entered_values[key_name] = {
-                "value": val,
-                "unit": punit,
-                "range": prange,
-                "original_name": pname
-            }
+            key_name = result_key(test_name, sub_name, pname).strip()
+            entered_values[key_name] = val
             
 
     # --- Description / Remarks ---
@@ -254,24 +248,26 @@ for test_name in patient_data.get("tests", []):
     st.divider()
 
 
-# ✅ Clean invalid Firebase data
-def clean_for_firebase(data):
-    if isinstance(data, dict):
-        new_dict = {}
-        for k, v in data.items():
-            if any(x in k for x in [".", "$", "#", "[", "]", "/"]):
-                continue
-            cleaned = clean_for_firebase(v)
-            if cleaned in [None, "", [], {}, set()]:
-                continue
-            new_dict[k] = cleaned
-        return new_dict
-    elif isinstance(data, list):
-        return [clean_for_firebase(x) for x in data if x not in [None, "", [], {}, set()]]
-    elif isinstance(data, (set, type, bytes)):
-        return None
-    else:
-        return data
+def results_diff(saved, entered):
+    """Load nantar badallele results -> multi-path update {"results/<key>": value}.
+
+    Value rikami zali tar path None (delete); navin rikami field lihit nahi.
+    Legacy {"value", "unit", ...} entry fakt value badalli tarach compact value
+    ne replace hote; same value asel tar jashi aahe tashi rahte.
+    """
+    saved = saved or {}
+    updates = {}
+    for key, val in entered.items():
+        if any(x in key for x in [".", "$", "#", "[", "]", "/"]):
+            continue
+        cleaned = result_codec.encode(val)
+        old = saved.get(key)
+        if cleaned is None:
+            if old is not None:
+                updates[f"results/{key}"] = None
+        elif old is None or cleaned != result_codec.encode(result_codec.value_of(old)):
+            updates[f"results/{key}"] = cleaned
+    return updates
 
 # ---------------------------
 # Save Results Button
@@ -284,20 +280,42 @@ if st.button("💾 Save Results"):
     if not entered_values:
         st.warning("⚠️ No values entered!")
     else:
-        all_results = patient_data.get("results", {})
-        all_results.update(entered_values)
-        patient_data["results"] = all_results
-        patient_data["report_generated"] = False
-        patient_data["reported_on"] = reported_on_str
-
-        try:
-            safe_data = clean_for_firebase(patient_data)
-            patients_ref.child(patient_id).update(safe_data)
-            st.success(f"✅ Results saved successfully for {patient_data['name']}!")
-            st.balloons()
-            show_generate = True
-        except Exception as e:
-            st.error(f"⚠️ Firebase update failed: {e}")
+        # Fakt badalleli result paths - purna patient record push karat nahi
+        updates = results_diff(saved_results, entered_values)
+        if not updates:
+            st.info("ℹ️ No changes to save.")
+        else:
+            changed = len(updates)
+            updates["report_generated"] = False
+            updates["reported_on"] = reported_on_str
+            try:
+                # Compact values kontya catalog version var - report exactly punha banto
+                updates[result_codec.CATALOG_VERSION_FIELD] = catalog.snapshot_version()
+                # Patient results + result_series (trend / delta) ek multi-path update madhe
+                root_updates = {f"patients/{patient_id}/{k}": v for k, v in updates.items()}
+                root_updates.update(result_history.series_updates(patient_id, patient_data, {
+                    path[len("results/"):]: value for path, value in updates.items() if path.startswith("results/")
+                }))
+                db.reference().update(root_updates)
+                local_mirror.apply_update(root_updates)
+                all_results = patient_data.setdefault("results", {})
+                for path, value in updates.items():
+                    if path.startswith("results/"):
+                        key = path[len("results/"):]
+                        if value is None:
+                            all_results.pop(key, None)
+                        else:
+                            all_results[key] = value
+                patient_data["report_generated"] = False
+                patient_data["reported_on"] = reported_on_str
+                patient_data[result_codec.CATALOG_VERSION_FIELD] = updates[result_codec.CATALOG_VERSION_FIELD]
+                reference_data.invalidate_patients()
+                st.session_state.pop(history_key, None)
+                st.success(f"✅ Results saved successfully for {patient_data['name']}! ({changed} changed)")
+                st.balloons()
+                show_generate = True
+            except Exception as e:
+                st.error(f"⚠️ Firebase update failed: {e}")
         print("\n\n=========== DEBUG RESULTS ===========")
         for k, v in entered_values.items():
             print(k, "=>", v)
@@ -308,37 +326,72 @@ if show_generate or patient_data.get("results"):
     st.markdown("---")
     st.subheader("📄 Generate Report PDF")
 
+    # Background job: UI block hot nahi, status fragment madhe poll
+    PENDING = (report_jobs.QUEUED, report_jobs.RUNNING)
+
+    @st.fragment(run_every=2)
+    def poll_report_job(job_id):
+        """Job chalu aahe tovarach polling; sampla ki purna page rerun (timer band)."""
+        job = report_jobs.get_job(job_id)
+        if job and job["status"] in PENDING:
+            st.info("⏳ Report is being generated... you can keep working.")
+        else:
+            st.rerun()
+
+    def show_report_job(job):
+        if job["status"] == report_jobs.FAILED:
+            st.error(f"⚠️ Report generation failed: {job['error']}")
+            return
+
+        final_report = job["output_path"]
+        if st.session_state.get(f"{job_key}_seen") != job["id"]:
+            st.session_state[f"{job_key}_seen"] = job["id"]
+            reference_data.invalidate_patients()  # lists madhe "Generated" status
+        st.success("✅ Report generated with letterhead!")
+        pdf_bytes = report_jobs.read_output(job)
+        if pdf_bytes:
+            st.download_button(
+                label="Download PDF",
+                data=pdf_bytes,
+                file_name=report_filename(patient_data),
+                mime="application/pdf",
+                key=f"dl_job_{job['id']}"
+            )
+
+        # WhatsApp Link
+        phone = patient_data.get("phone","").replace("+","").replace(" ","")
+        if phone.startswith("0"): phone = phone[1:]
+        if phone:
+            pdf_link = final_report.replace("\\","/")
+            message = f"Hello {patient_data['name']},\nYour report is ready! Download: {pdf_link}"
+            encoded_msg = urllib.parse.quote(message)
+            whatsapp_url = f"https://api.whatsapp.com/send?phone={phone}&text={encoded_msg}"
+            st.markdown(f'<a href="{whatsapp_url}" target="_blank"><button style="padding:8px 16px;background:#25D366;color:white;border:none;border-radius:5px;font-size:14px;">📤 Send via WhatsApp</button></a>', unsafe_allow_html=True)
+        else:
+            st.warning("⚠️ No valid phone number found.")
+
+    job_key = f"report_job_{patient_id}"
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🧾 Generate With Letterhead"):
-            letterhead_path = os.path.join(os.getcwd(), "letterhead(1).pdf")  # relative path
-            final_report, qr_img_path = generate_report_pdf_with_letterhead(letterhead_path, patient_data, patient_data["results"], patient_data.get("tests", []), test_data)
-            st.success("✅ Report generated with letterhead!")
-
-            # WhatsApp Link
-            phone = patient_data.get("phone","").replace("+","").replace(" ","")
-            if phone.startswith("0"): phone = phone[1:]
-            if phone:
-                pdf_link = final_report.replace("\\","/")
-                message = f"Hello {patient_data['name']},\nYour report is ready! Download: {pdf_link}"
-                encoded_msg = urllib.parse.quote(message)
-                whatsapp_url = f"https://api.whatsapp.com/send?phone={phone}&text={encoded_msg}"
-                st.markdown(f'<a href="{whatsapp_url}" target="_blank"><button style="padding:8px 16px;background:#25D366;color:white;border:none;border-radius:5px;font-size:14px;">📤 Send via WhatsApp</button></a>', unsafe_allow_html=True)
-            else:
-                st.warning("⚠️ No valid phone number found.")
+            st.session_state[job_key] = report_jobs.submit_report_job(patient_id, letterhead=True)
+        job = report_jobs.get_job(st.session_state[job_key]) if job_key in st.session_state else None
+        if job and job["status"] in PENDING:
+            poll_report_job(job["id"])
+        elif job:
+            show_report_job(job)
 
     with col2:
         if st.button("📄 Generate Without Letterhead"):
-            temp_report_path, qr_path = generate_report_pdf_without_letterhead(patient_data, patient_data["results"], patient_data.get("tests", []), test_data)
+            # Memory madhe render -> bytes direct download button la
+            pdf_bytes = render_report(patient_data, patient_data["results"], patient_data.get("tests", []), test_data)
             st.success("✅ PDF generated without letterhead!")
-            if os.path.exists(temp_report_path):
-                with open(temp_report_path, "rb") as f:
-                    st.download_button(
-                        label="Download PDF",
-                        data=f,
-                        file_name=os.path.basename(temp_report_path),
-                        mime="application/pdf"
-                    )
+            st.download_button(
+                label="Download PDF",
+                data=pdf_bytes,
+                file_name=report_filename(patient_data),
+                mime="application/pdf"
+            )
             
                     
 # ---------------------------
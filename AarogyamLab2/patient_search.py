@@ -0,0 +1,278 @@
+import time
+import bisect
+import threading
+from datetime import datetime
+from firebase_admin import db
+
+import firebase_app
+import local_mirror
+
+# ----------------------------
+# PATIENT SEARCH
+# ----------------------------
+# Local mirror (local_mirror.py) sync asel tar sagla search SQLite madhe.
+# Nahitar:
+# purna "patients" tree download na karta:
+#   - date / newest-first: indexed query on "registered_key" (sortable ISO
+#     "YYYY-mm-ddTHH:MM"), limit + cursor pagination
+#   - name: chhota "patient_index/{pid}: {n: name, d: registered_key}" node var
+#     local prefix/trigram index, matching ids chech fakt fetch
+#
+# Firebase rules madhe index lagto:
+#   "patients":      {".indexOn": ["registered_key"]}
+#   "patient_index": {".indexOn": ["d"]}
+
+PATIENTS_PATH = "patients"
+INDEX_PATH = "patient_index"
+PAGE_SIZE = 50
+INDEX_REFRESH_SECONDS = 30
+
+REGISTERED_FORMATS = ("%d/%m/%Y %I:%M %p", "%d/%m/%Y")
+
+
+def parse_registered_on(reg_str):
+    for fmt in REGISTERED_FORMATS:
+        try:
+            return datetime.strptime(reg_str or "", fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def registered_key(reg_str):
+    """'18/10/2026 09:05 AM' -> '2026-10-18T09:05' (string order == time order)."""
+    dt = parse_registered_on(reg_str)
+    return dt.strftime("%Y-%m-%dT%H:%M") if dt else ""
+
+
+def index_entry(patient_data):
+    return {"n": patient_data.get("name", ""), "d": patient_data.get("registered_key", "")}
+
+
+def index_updates(pid, patient_data):
+    """Patient save barobar root multi-path update madhe taknyasathi paths."""
+    return {f"{INDEX_PATH}/{pid}": index_entry(patient_data)}
+
+
+# ----------------------------
+# LOCAL NAME INDEX
+# ----------------------------
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """In-memory prefix + trigram index over patient_index entries."""
+
+    def __init__(self):
+        self.entries = {}    # pid -> {"n", "d"}
+        self._names = {}     # pid -> lowercased name
+        self._tokens = []    # sorted (token, pid) for prefix search
+        self._grams = {}     # trigram -> set(pid)
+        self.last_key = ""
+
+    def _add_grams(self, pid, entry):
+        name = (entry.get("n") or "").lower()
+        self.entries[pid] = entry
+        self._names[pid] = name
+        for g in _trigrams(name):
+            self._grams.setdefault(g, set()).add(pid)
+        self.last_key = max(self.last_key, entry.get("d") or "")
+        return name
+
+    def load(self, rows):
+        """Bulk build (pahila load): tokens ek da sort - insort chi O(n^2) nahi."""
+        tokens = []
+        for pid, entry in rows.items():
+            if isinstance(entry, dict) and pid not in self.entries:
+                tokens.extend((tok, pid) for tok in self._add_grams(pid, entry).split())
+        self._tokens = sorted(self._tokens + tokens)
+
+    def add(self, pid, entry):
+        if pid in self.entries:
+            self.remove(pid)
+        for tok in self._add_grams(pid, entry).split():
+            bisect.insort(self._tokens, (tok, pid))
+
+    def remove(self, pid):
+        name = self._names.pop(pid, "")
+        self.entries.pop(pid, None)
+        for tok in name.split():
+            i = bisect.bisect_left(self._tokens, (tok, pid))
+            if i < len(self._tokens) and self._tokens[i] == (tok, pid):
+                del self._tokens[i]
+        for g in _trigrams(name):
+            ids = self._grams.get(g)
+            if ids:
+                ids.discard(pid)
+
+    def _prefix(self, q):
+        found = set()
+        i = bisect.bisect_left(self._tokens, (q, ""))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(q):
+            found.add(self._tokens[i][1])
+            i += 1
+        return found
+
+    def search(self, query):
+        q = (query or "").strip().lower()
+        if not q:
+            return set(self.entries)
+        if len(q) < 3:
+            return self._prefix(q)
+        grams = sorted((self._grams.get(g, set()) for g in _trigrams(q)), key=len)
+        candidates = set.intersection(*grams) if grams else set()
+        return {pid for pid in candidates if q in self._names.get(pid, "")}
+
+
+_index = NameIndex()
+_index_lock = threading.Lock()
+_index_state = {"loaded": False, "refreshed_at": 0.0}
+
+
+def get_name_index():
+    """Pahilya veli purna index node, nantar fakt navin entries (d >= last_key)."""
+    with _index_lock:
+        now = time.monotonic()
+        if _index_state["loaded"] and now - _index_state["refreshed_at"] < INDEX_REFRESH_SECONDS:
+            return _index
+        ref = db.reference(INDEX_PATH)
+        if not _index_state["loaded"]:
+            _index.load(ref.get() or {})
+        else:
+            rows = ref.order_by_child("d").start_at(_index.last_key).get() or {}
+            for pid, entry in rows.items():
+                if isinstance(entry, dict):
+                    _index.add(pid, entry)
+        _index_state.update(loaded=True, refreshed_at=now)
+        return _index
+
+
+def note_saved(pid, patient_data):
+    """Local save nantar index lagech update (refresh chi vaat nahi)."""
+    with _index_lock:
+        if _index_state["loaded"]:
+            _index.add(pid, index_entry(patient_data))
+
+
+# ----------------------------
+# QUERIES
+# ----------------------------
+def _with_id(rows):
+    out = []
+    for pid, pdata in rows:
+        if isinstance(pdata, dict):
+            pdata["id"] = pid
+            out.append(pdata)
+    return out
+
+
+def fetch_patients(ids):
+    """Fetch specific patients in parallel (one small read each)."""
+    ids = list(ids)
+    if not ids:
+        return []
+    if local_mirror.ready(PATIENTS_PATH):
+        return local_mirror.get_patients(ids)
+    data = firebase_app.get_many(f"{PATIENTS_PATH}/{pid}" for pid in ids)
+    return _with_id((pid, data[f"{PATIENTS_PATH}/{pid}"]) for pid in ids)
+
+
+def _day_bounds(day):
+    start = day.strftime("%Y-%m-%d")
+    return start, start + "\uf8ff"
+
+
+def _query_by_key(start, end, cursor, limit):
+    """Newest-first page from the registered_key index."""
+    skip = set()
+    if cursor:
+        end, skip_ids = cursor
+        skip = set(skip_ids)
+    query = db.reference(PATIENTS_PATH).order_by_child("registered_key")
+    if start:
+        query = query.start_at(start)
+    if end:
+        query = query.end_at(end)
+    rows = query.limit_to_last(limit + len(skip) + 1).get() or {}
+
+    ordered = [(pid, p) for pid, p in reversed(list(rows.items())) if pid not in skip]
+    page, more = ordered[:limit], len(ordered) > limit
+    patients = _with_id(page)
+    if not more or not patients:
+        return patients, None
+    last_key = patients[-1].get("registered_key", "")
+    same_key = [p["id"] for p in patients if p.get("registered_key", "") == last_key]
+    if last_key == (cursor[0] if cursor else None):
+        same_key = list(skip) + same_key
+    return patients, (last_key, same_key)
+
+
+def search_patients(name="", day=None, limit=PAGE_SIZE, cursor=None):
+    """Return (patients newest first, next_cursor or None).
+
+    ``day`` is a ``datetime.date``; pass the returned cursor back for the next page.
+    Served from the local SQLite mirror when it is synced.
+    """
+    if local_mirror.ready(PATIENTS_PATH):
+        return local_mirror.search_patients(name, day, limit=limit, offset=cursor or 0)
+
+    if not (name or "").strip():
+        start, end = _day_bounds(day) if day else (None, None)
+        return _query_by_key(start, end, cursor, limit)
+
+    index = get_name_index()
+    ids = index.search(name)
+    if day:
+        prefix = day.strftime("%Y-%m-%d")
+        ids = [pid for pid in ids if (index.entries[pid].get("d") or "").startswith(prefix)]
+    ordered = sorted(ids, key=lambda pid: index.entries[pid].get("d") or "", reverse=True)
+
+    offset = cursor or 0
+    page_ids = ordered[offset:offset + limit]
+    next_cursor = offset + limit if offset + limit < len(ordered) else None
+    return fetch_patients(page_ids), next_cursor
+
+
+def patients_between(start, end, doctor=None):
+    """All patients registered start..end (``datetime.date``, inclusive), newest first.
+
+    Bulk export sathi - purna range, pages madhe vachun (ek mothi read nahi).
+    """
+    start_key, end_key = _day_bounds(start)[0], _day_bounds(end)[1]
+    if local_mirror.ready(PATIENTS_PATH):
+        return local_mirror.patients_between(start_key, end_key, doctor)
+    patients, cursor = [], None
+    while True:
+        page, cursor = _query_by_key(start_key, end_key, cursor, PAGE_SIZE * 4)
+        patients.extend(page)
+        if cursor is None:
+            break
+    if doctor:
+        patients = [p for p in patients if p.get("doctor") == doctor]
+    return patients
+
+
+# ----------------------------
+# BACKFILL (juna data sathi ek da)
+# ----------------------------
+def backfill_registered_keys():
+    """Existing patients la registered_key + patient_index lihito. Ek full read."""
+    patients = db.reference(PATIENTS_PATH).get() or {}
+    updates = {}
+    for pid, pdata in patients.items():
+        if not isinstance(pdata, dict):
+            continue
+        key = registered_key(pdata.get("registered_on", ""))
+        if pdata.get("registered_key") != key:
+            updates[f"{PATIENTS_PATH}/{pid}/registered_key"] = key
+        pdata["registered_key"] = key
+        updates.update(index_updates(pid, pdata))
+    firebase_app.update_many(updates)
+    print(f"✅ Indexed {len(patients)} patients")
+    return len(patients)
+
+
+if __name__ == "__main__":
+    firebase_app.init_app()
+    backfill_registered_keys()
@@ -0,0 +1,30 @@
+import io
+from functools import lru_cache
+
+import qrcode
+
+# ----------------------------
+# QR CODES (memory only, LRU cache)
+# ----------------------------
+# Ekach report link sathi QR punha encode hot nahi; disk la kadhi lihit nahi.
+
+QR_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_png(link):
+    """QR code PNG bytes for ``link`` (memoized by URL)."""
+    buf = io.BytesIO()
+    qrcode.make(link).save(buf)
+    return buf.getvalue()
+
+
+def save_qr(link, path):
+    """Caller la PNG file hava asel tarach (cache madhun, encode nahi)."""
+    with open(path, "wb") as f:
+        f.write(qr_png(link))
+    return path
+
+
+def cache_info():
+    return qr_png.cache_info()
@@ -0,0 +1,176 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# ----------------------------
+# NORMAL RANGE PARSER
+# ----------------------------
+# Catalog madhe range free text aahe: "4.5 - 11.0", "<200", "Up to 40",
+# "M: 13-17 F: 12-15", "Male: 13 - 17, Female: 12 - 15", "4,000 - 11,000",
+# "1,50,000 - 4,50,000". Pratyek text ek da parse (lru_cache) -> NormalRange;
+# flagging NumPy madhe ekdam saglya values var. Fakt H / L - catalog madhe
+# critical limits nahit, mhanun report var "critical" andaj chhapat nahi.
+
+NORMAL, LOW, HIGH = 0, -1, 1
+FLAG_LABELS = {LOW: "L", NORMAL: "", HIGH: "H"}
+
+_NUM = r"[-+]?\d+(?:\.\d+)?"
+# Digit grouping (4,000 / 1,50,000) - ankanmadhla comma kadhto, "M: 13-17, F: 12-15" madhla nahi
+_GROUPING = re.compile(r"(?<=\d),(?=\d)")
+_BETWEEN = re.compile(rf"({_NUM})\s*(?:-|–|to)\s*({_NUM})", re.I)
+_UPPER = re.compile(rf"(?:<=?|≤|up\s*to|upto|below|less than)\s*({_NUM})", re.I)
+_LOWER = re.compile(rf"(?:>=?|≥|above|more than|greater than)\s*({_NUM})", re.I)
+# Purna shabd (Male/Female) la separator optional; ekta "M"/"F" la ":" kiva "-" lagto
+_GENDER = re.compile(r"\b(male|female|men|women|m(?=\s*[:\-])|f(?=\s*[:\-]))\b\s*[:\-]?\s*", re.I)
+
+
+class NormalRange:
+    """Parsed range: default (low, high) plus optional per-gender bounds. NaN = no bound."""
+    __slots__ = ("text", "low", "high", "by_gender")
+
+    def __init__(self, text, low=np.nan, high=np.nan, by_gender=None):
+        self.text = text
+        self.low = low
+        self.high = high
+        self.by_gender = by_gender or {}
+
+    def bounds(self, gender=None):
+        g = (gender or "").strip()[:1].upper()
+        return self.by_gender.get(g, (self.low, self.high))
+
+    @property
+    def numeric(self):
+        return not (np.isnan(self.low) and np.isnan(self.high)) or bool(self.by_gender)
+
+
+def _parse_bounds(text):
+    m = _BETWEEN.search(text)
+    if m:
+        return float(m.group(1)), float(m.group(2))
+    m = _UPPER.search(text)
+    if m:
+        return np.nan, float(m.group(1))
+    m = _LOWER.search(text)
+    if m:
+        return float(m.group(1)), np.nan
+    return np.nan, np.nan
+
+
+@lru_cache(maxsize=4096)
+def compile_range(text):
+    """Free-text range -> NormalRange (memoized by text)."""
+    text = str(text or "").strip()
+    clean = _GROUPING.sub("", text)
+    by_gender = {}
+    parts = _GENDER.split(clean)
+    # split -> [prefix, gender, rest, gender, rest, ...]
+    if len(parts) >= 3:
+        for label, segment in zip(parts[1::2], parts[2::2]):
+            low, high = _parse_bounds(segment)
+            if not (np.isnan(low) and np.isnan(high)):
+                by_gender["F" if label[:1].lower() in ("f", "w") else "M"] = (low, high)
+    if by_gender:
+        lows = [b[0] for b in by_gender.values()]
+        highs = [b[1] for b in by_gender.values()]
+        # Gender mahit nasel tar doghanchi union
+        low = np.nan if any(np.isnan(lows)) else min(lows)
+        high = np.nan if any(np.isnan(highs)) else max(highs)
+        return NormalRange(text, low, high, by_gender)
+    low, high = _parse_bounds(clean)
+    return NormalRange(text, low, high)
+
+
+_test_cache = {}
+
+
+def compile_test(test_name, test_info):
+    """Per test definition: {(sub, param or None): NormalRange}, memoized by the range texts."""
+    entries = []
+    for s in (test_info or {}).get("subtests", []) or []:
+        entries.append(((s.get("name", ""), None), s.get("range", "")))
+        for p in s.get("sub_params", []) or []:
+            entries.append(((s.get("name", ""), p.get("name", "")), p.get("range", "")))
+    key = (test_name, tuple(entries))
+    compiled = _test_cache.get(key)
+    if compiled is None:
+        compiled = {k: compile_range(text) for k, text in entries}
+        if len(_test_cache) > 1024:
+            _test_cache.clear()
+        _test_cache[key] = compiled
+    return compiled
+
+
+# ----------------------------
+# VECTORIZED FLAGGING
+# ----------------------------
+def to_number(value):
+    try:
+        return float(_GROUPING.sub("", str(value).strip()))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def flag_array(values, lows, highs):
+    """NumPy flag codes for parallel arrays (NaN value/bound = not flagged)."""
+    values = np.asarray(values, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    codes = np.zeros(values.shape, dtype=np.int8)
+    with np.errstate(invalid="ignore"):
+        low = values < lows
+        high = values > highs
+        codes[low] = LOW
+        codes[high] = HIGH
+    return codes
+
+
+def _normal(row):
+    # compile_test() kadun aalela NormalRange asel tar toch, nahi tar text parse (cached)
+    return row.get("normal") or compile_range(row.get("range", ""))
+
+
+def flag_rows(rows, gender=None):
+    """rows: dicts with "value" and "range" (optional compiled "normal") -> flag codes (one NumPy pass)."""
+    if not rows:
+        return []
+    n = len(rows)
+    values = np.empty(n)
+    lows = np.empty(n)
+    highs = np.empty(n)
+    for i, r in enumerate(rows):
+        values[i] = to_number(r.get("value"))
+        lows[i], highs[i] = _normal(r).bounds(gender)
+    return flag_array(values, lows, highs).tolist()
+
+
+# ----------------------------
+# PARSER CASES (python ranges.py)
+# ----------------------------
+PARSER_CASES = [
+    ("4.5 - 11.0", None, (4.5, 11.0)),
+    ("<200", None, (np.nan, 200.0)),
+    ("Up to 40", None, (np.nan, 40.0)),
+    ("> 60", None, (60.0, np.nan)),
+    ("4,000 - 11,000", None, (4000.0, 11000.0)),
+    ("1,50,000 - 4,50,000", None, (150000.0, 450000.0)),
+    ("4,000-11,000 cells/cumm", None, (4000.0, 11000.0)),
+    ("M: 13-17 F: 12-15", "Female", (12.0, 15.0)),
+    ("Male: 13 - 17, Female: 12 - 15", "Male", (13.0, 17.0)),
+    ("Male: 4,500 - 5,500, Female: 4,000 - 5,000", "Female", (4000.0, 5000.0)),
+]
+
+
+def _check_parser():
+    failed = 0
+    for text, gender, expected in PARSER_CASES:
+        got = compile_range(text).bounds(gender)
+        if not np.allclose(got, expected, equal_nan=True):
+            failed += 1
+            print(f"❌ {text!r} ({gender}): {got} != {expected}")
+    print(f"✅ {len(PARSER_CASES) - failed}/{len(PARSER_CASES)} range cases ok")
+    return failed
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if _check_parser() else 0)
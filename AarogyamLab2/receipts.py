@@ -0,0 +1,151 @@
+import io
+from functools import lru_cache
+
+from num2words import num2words
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+
+# ----------------------------
+# RECEIPTS
+# ----------------------------
+# Receipt memory madhe (BytesIO) render hoto, temp file nahi. Ekach canvas var
+# anek receipts (ek page pratyeki) -> divsachya saglya receipts ek PDF madhe,
+# ek print job. Lab header form XObject mhanun document madhe ek da.
+
+LAB_NAME = "Aarogyam Clinical Laboratory"
+LAB_ADDRESS = "Near Niltara Hotel, Ichalkaranji, Korochi - 416109"
+LAB_PHONE = "Ph: 7875261778 / 7066261778"
+HEADER_FORM = "receipt_header"
+WIDTH, HEIGHT = A4
+
+
+@lru_cache(maxsize=1024)
+def amount_in_words(amount):
+    """'Five Hundred' - same amounts roj repeat hotat, num2words ek da."""
+    return num2words(amount, lang='en').title()
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def receipt_items(patient, tests_catalog):
+    """[(test name, price)] at the prices billed at registration.
+
+    Juna patients (test_prices nahi): aajche catalog prices fakt jar tyancha
+    total total_bill barobar asel; nahi tar price None (row var "-").
+    """
+    tests = patient.get("tests", []) or []
+    billed = patient.get("test_prices") or []
+    if len(billed) == len(tests) and tests:
+        return [(t, _price(price)) for t, price in zip(tests, billed)]
+    items = [(t, _price((tests_catalog.get(t) or {}).get("price", 0))) for t in tests]
+    if "total_bill" in patient and sum(price for _, price in items) != _price(patient["total_bill"]):
+        return [(t, None) for t in tests]
+    return items
+
+
+def receipt_total(patient, items):
+    """Billed total_bill (nasel tar items chi beriz)."""
+    if "total_bill" in patient:
+        return _price(patient["total_bill"])
+    return sum(price or 0 for _, price in items)
+
+
+def _header_form(c):
+    c.beginForm(HEADER_FORM)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(WIDTH / 2, HEIGHT - 60, LAB_NAME)
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(WIDTH / 2, HEIGHT - 75, LAB_ADDRESS)
+    c.drawCentredString(WIDTH / 2, HEIGHT - 90, LAB_PHONE)
+    c.setFont("Helvetica-Bold", 13)
+    c.drawCentredString(WIDTH / 2, HEIGHT - 120, "RECEIPT")
+    c.endForm()
+
+
+def draw_receipt(c, patient_name, age, gender, doctor_name, date_str, tests_list, total=None):
+    """One receipt on the current page of ``c`` (ends with showPage).
+
+    ``total`` dila nahi tar rows chi beriz; price None asleli row "-" chhapte.
+    """
+    c.doForm(HEADER_FORM)
+
+    # --- Patient Info ---
+    c.setFont("Helvetica", 10)
+    y = HEIGHT - 150
+    c.drawString(60, y, f"Name : {patient_name}")
+    c.drawRightString(WIDTH - 60, y, f"Date : {date_str}")
+
+    y -= 18
+    c.drawString(60, y, f"Age / Gender : {age} / {gender}")
+    c.drawRightString(WIDTH - 60, y, f"Referred By : {doctor_name}")
+
+    # --- Table Header ---
+    y -= 35
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(60, y, "Tests Carried Out")
+    c.drawRightString(WIDTH - 140, y, "Amount (Rs.)")
+    c.line(50, y - 5, WIDTH - 50, y - 5)
+
+    # --- Table Content ---
+    c.setFont("Helvetica", 10)
+    y -= 25
+    row_total = 0
+    for test_name, price in tests_list:
+        c.drawString(60, y, test_name)
+        if price is None:
+            c.drawRightString(420, y, "-")
+        else:
+            price_val = _price(price)
+            c.drawRightString(420, y, f"{price_val:.2f}")
+            row_total += price_val
+        y -= 15
+        if y < 100:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            y = HEIGHT - 100
+
+    # --- Total ---
+    if total is None:
+        total = row_total
+    c.line(250, y - 5, 420, y - 5)
+    y -= 20
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(60, y, "Total Amount:")
+    c.drawRightString(420, y, f"{total:.2f}")
+
+    # --- Amount in Words ---
+    y -= 35
+    c.setFont("Helvetica", 10)
+    c.drawString(60, y, f"Amount In Words : Rs. {amount_in_words(total)} Only")
+
+    # --- Footer ---
+    y -= 50
+    c.drawRightString(WIDTH - 60, y, "For AAROGYAM CLINICAL LABORATORY")
+    y -= 40
+    c.setFont("Helvetica-Oblique", 10)
+    c.drawCentredString(WIDTH / 2, y, "Thank you for visiting!")
+    c.showPage()
+
+
+def render_receipts(patients, tests_catalog):
+    """Multi-page receipt PDF bytes (one receipt per patient), in memory."""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    _header_form(c)
+    for p in patients:
+        items = receipt_items(p, tests_catalog)
+        draw_receipt(
+            c, p.get("name", ""), p.get("age", ""), p.get("gender", ""), p.get("doctor", ""),
+            (p.get("registered_on", "") or "").split(" ")[0], items, total=receipt_total(p, items)
+        )
+    c.save()
+    return buffer.getvalue()
+
+
+def render_receipt(patient, tests_catalog):
+    return render_receipts([patient], tests_catalog)
@@ -0,0 +1,69 @@
+import streamlit as st
+from firebase_admin import db
+
+import catalog
+import day_index
+import local_mirror
+import patient_search
+
+# ----------------------------
+# STREAMLIT CACHED LOOKUPS
+# ----------------------------
+# Pratyek widget interaction la script rerun hoto; doctors / patient search
+# punha network var jau naye mhanun st.cache_* (tests sathi catalog module
+# cha swatacha cache). Master pages save / delete nantar invalidate_*() call
+# kartat - TTL fakt dusrya process madhun zalelya badlansathi.
+
+DOCTORS_TTL = 600  # seconds
+PATIENTS_TTL = 30
+DAY_LIMIT = 500
+
+
+@st.cache_data(ttl=DOCTORS_TTL, show_spinner=False)
+def get_doctors():
+    """{doctor_id: {"name", "qualification"}}"""
+    doctors = local_mirror.get_doctors() if local_mirror.ready("doctors") else (db.reference("doctors").get() or {})
+    return doctors if isinstance(doctors, dict) else {}
+
+
+def doctor_options():
+    """Dropdown sathi "Name (Qualification)" list."""
+    return [f"{v.get('name', '')} ({v.get('qualification', '')})" for v in get_doctors().values()]
+
+
+def get_tests():
+    """Shared read-only catalog; catalog.get_tests() cha TTL + version cache purto."""
+    return catalog.get_tests()
+
+
+@st.cache_data(ttl=PATIENTS_TTL, show_spinner=False)
+def search_patients(name="", day=None, limit=patient_search.PAGE_SIZE, cursor=None):
+    """patient_search.search_patients() with a short per-filter cache (returns copies)."""
+    return patient_search.search_patients(name, day, limit=limit, cursor=cursor)
+
+
+@st.cache_data(ttl=PATIENTS_TTL, show_spinner=False)
+def patients_on_day(day):
+    """Daily list: patients_by_day cha ek node (mirror / migration nasel tar search)."""
+    if not local_mirror.ready("patients"):
+        patients = day_index.patients_on_day(day)
+        if patients is not None:
+            return patients
+    patients, _ = patient_search.search_patients(day=day, limit=DAY_LIMIT)
+    return patients
+
+
+# ----------------------------
+# INVALIDATION HOOKS
+# ----------------------------
+def invalidate_doctors():
+    get_doctors.clear()
+
+
+def invalidate_tests():
+    catalog.invalidate()
+
+
+def invalidate_patients():
+    search_patients.clear()
+    patients_on_day.clear()
@@ -1,12 +1,10 @@
 import os
 import io
-import qrcode
 import threading
 import subprocess
 from datetime import datetime
 from copy import deepcopy
-import base64
-import json
+import hashlib
 import shutil
 import tempfile
 
@@ -16,128 +14,144 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 from reportlab.platypus import Paragraph
 from reportlab.lib.styles import ParagraphStyle
-import streamlit as st
-import tempfile
-# ----------------------------
-# Firebase Admin Initialization (Cloud Secret)
-# ----------------------------
-import firebase_admin
-from firebase_admin import credentials, db
-
-if not firebase_admin._apps:
-    firebase_secret_b64 = os.environ.get("FIREBASE_ADMIN_SECRET")
-    if not firebase_secret_b64:
-        raise ValueError("FIREBASE_ADMIN_SECRET env variable not set")
-    
-    firebase_json = json.loads(base64.b64decode(firebase_secret_b64))
-    cred = credentials.Certificate(firebase_json)
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://aarogyamlab-e37e4-default-rtdb.firebaseio.com/"
-    })
+
+import catalog
+from result_keys import ResultKeyIndex, normalize
+from report_layout import build_blocks, draw_results
+import qr_codes
+import ranges
+import artifact_store
+import result_codec
+# Firebase init caller kadun (firebase_app.init_app) - import la network nahi
+from firebase_admin import db
 
 # ----------------------------
 # PDF GENERATION FUNCTIONS
 # ----------------------------
 
-def merge_with_letterhead(letterhead_path, report_path, output_path):
-    letter_pdf = fitz.open(letterhead_path)
-    report_pdf = fitz.open(report_path)
-    lh_pages = len(letter_pdf)
-    merged_pdf = fitz.open()
-
-    for i in range(len(report_pdf)):
-        report_page = report_pdf[i]
-        lh_page = letter_pdf[0] if lh_pages==1 else letter_pdf[i % lh_pages]
-        new_page = merged_pdf.new_page(width=lh_page.rect.width, height=lh_page.rect.height)
-        new_page.show_pdf_page(lh_page.rect, letter_pdf, lh_page.number)
-        new_page.show_pdf_page(report_page.rect, report_pdf, report_page.number)
-
-    merged_pdf.save(output_path)
-    merged_pdf.close()
+# App folder madhla letterhead (cwd var avalambun nahi)
+DEFAULT_LETTERHEAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "letterhead(1).pdf")
+
+# --- Letterhead template cache ---
+# Letterhead PDF ek da parse karun process madhe thevto; file badalli (mtime/size/hash) tar reload.
+_LETTERHEAD_CACHE = {}
+_LETTERHEAD_LOCK = threading.Lock()
+
+
+class LetterheadTemplate:
+    """Parsed letterhead document, shared by every report in this process."""
+
+    def __init__(self, path, stat, data):
+        self.path = path
+        self.mtime = stat.st_mtime
+        self.size = stat.st_size
+        self.digest = hashlib.sha1(data).hexdigest()
+        self.doc = fitz.open("pdf", data)
+        self.page_count = len(self.doc)
+
+    def is_stale(self, stat):
+        return stat.st_mtime != self.mtime or stat.st_size != self.size
+
+    def page_for(self, index):
+        return 0 if self.page_count == 1 else index % self.page_count
+
+
+def get_letterhead_template(letterhead_path):
+    """Return cached LetterheadTemplate; re-parse only when the file changed."""
+    path = os.path.abspath(letterhead_path)
+    stat = os.stat(path)
+    with _LETTERHEAD_LOCK:
+        template = _LETTERHEAD_CACHE.get(path)
+        if template is not None and not template.is_stale(stat):
+            return template
+        with open(path, "rb") as f:
+            data = f.read()
+        if template is not None and hashlib.sha1(data).hexdigest() == template.digest:
+            # Only touched, content same -> keep parsed doc
+            template.mtime, template.size = stat.st_mtime, stat.st_size
+            return template
+        if template is not None:
+            template.doc.close()
+        template = LetterheadTemplate(path, stat, data)
+        _LETTERHEAD_CACHE[path] = template
+        return template
+
+
+def stamp_letterhead(template, report_pdf):
+    """Letterhead report chya pratyek page khali stamp karto (in place)."""
+    with _LETTERHEAD_LOCK:
+        for page in report_pdf:
+            # Same source page -> PyMuPDF reuses one XObject for all pages of this report
+            page.show_pdf_page(page.rect, template.doc, template.page_for(page.number), overlay=False)
+    return report_pdf
+
+
+def merge_letterhead_bytes(letterhead_path, report_bytes):
+    """In-memory merge: report PDF bytes -> letterhead PDF bytes (no disk I/O)."""
+    template = get_letterhead_template(letterhead_path)
+    report_pdf = fitz.open("pdf", report_bytes)
+    stamp_letterhead(template, report_pdf)
+    merged = report_pdf.tobytes(garbage=1, deflate=True)
     report_pdf.close()
-    letter_pdf.close()
-    print(f"✅ Merged PDF saved at: {output_path}")
+    return merged
 
-# --- Utility: Normalize result keys ---
-def normalize(x: str):
-    return (x.replace(" ", "_").replace("-", "_").replace("(", "_")
-            .replace(")", "_").replace(".", "_").replace("/", "_").replace("__", "_"))
 
+def merge_with_letterhead(letterhead_path, report_path, output_path):
+    with open(report_path, "rb") as f:
+        merged = merge_letterhead_bytes(letterhead_path, f.read())
+    with open(output_path, "wb") as f:
+        f.write(merged)
+    print(f"✅ Merged PDF saved at: {output_path}")
+
+# --- Result key lookup (see result_keys.py) ---
 def find_result_key(results, test, sub, param=None):
-    original_sub = sub
-    safe_sub = normalize(sub)
-    if param:
-        original_param = param
-        safe_param = normalize(param)
-        variants = [
-            f"{test}::{original_sub}::{original_param}",
-            f"{test}::{safe_sub}::{safe_param}",
-            f"{test}::{safe_sub}_{safe_param}",
-            f"{test}::{safe_sub}::{safe_param}_",
-        ]
-    else:
-        variants = [f"{test}::{original_sub}", f"{test}::{safe_sub}", f"{test}::{safe_sub}_"]
-
-    for key in results.keys():
-        if key in variants:
-            return key
-    for key in results.keys():
-        k_clean = normalize(key.lower())
-        if param:
-            if normalize(original_sub.lower()) in k_clean and normalize(original_param.lower()) in k_clean:
-                return key
-        else:
-            if normalize(original_sub.lower()) in k_clean:
-                return key
-    return None
+    """One-off lookup; for many lookups build a ResultKeyIndex once."""
+    return ResultKeyIndex(results).find(test, sub, param)
 
 # ----------------------------
-# PDF WITHOUT LETTERHEAD
+# REPORT NAMING + QR
 # ----------------------------
-def generate_report_pdf_without_letterhead(
-    patient_data, results, selected_tests, test_data,
-    descriptions=None, output_path=None, report_date=None, qr_img_path=None
-):
-    # tmp_dir = st.session_state.get("tmp_dir", "/tmp")
-    # SAFE TEMP DIRECTORY (Windows + Cloud)
-    # Universal tmp folder
-    tmp_dir = tempfile.gettempdir()
-    
-    # Example: 'C:\\Users\\hp\\AppData\\Local\\Temp'
-    os.makedirs(tmp_dir, exist_ok=True)
-    
-
-    # Report PDF path
-    
-    safe_name = patient_data['name'].replace(" ", "_")
-    unique_id = str(patient_data.get("id","0000"))
-    current_date_file = datetime.now().strftime("%d%m%Y")
-    pdf_filename = f"{unique_id}_{safe_name}_{current_date_file}_Report.pdf"
-        
-    if output_path:
-        output_file = output_path
-    else:
-        output_file = os.path.join(tmp_dir, pdf_filename)
+GITHUB_USERNAME = "developmentof1"
+REPORTS_REPO = "AarogyamLabReports"
 
-    # QR code path (same temp folder)
-    qr_img_path = os.path.join(tmp_dir, f"qr_{unique_id}.png")
 
-    # GitHub link for QR
-    github_username = "developmentof1"
-    repo_name = "AarogyamLabReports"
-    github_pdf_link = f"https://raw.githubusercontent.com/{github_username}/{repo_name}/main/{pdf_filename}"
+def report_filename(patient_data, when=None):
+    safe_name = patient_data["name"].replace(" ", "_")
+    unique_id = str(patient_data.get("id", "0000"))
+    current_date_file = (when or datetime.now()).strftime("%d%m%Y")
+    return f"{unique_id}_{safe_name}_{current_date_file}_Report.pdf"
 
-    # Generate QR code
-    qrcode.make(github_pdf_link).save(qr_img_path)
-    print(f"✅ QR Code generated for link: {github_pdf_link}")
 
-    c = canvas.Canvas(output_file, pagesize=A4)
+def report_qr_link(pdf_filename):
+    return f"https://raw.githubusercontent.com/{GITHUB_USERNAME}/{REPORTS_REPO}/main/{pdf_filename}"
+
+
+def make_qr_png(link):
+    """QR code PNG bytes - qr_codes LRU madhun (memory only)."""
+    return qr_codes.qr_png(link)
+
+
+# ----------------------------
+# IN-MEMORY REPORT RENDERING
+# ----------------------------
+def render_report_bytes(
+    patient_data, results, selected_tests, test_data,
+    descriptions=None, report_date=None, qr_png=None
+):
+    """Report PDF (without letterhead) BytesIO madhe render karun bytes return karto."""
+    if qr_png is None:
+        qr_png = make_qr_png(report_qr_link(report_filename(patient_data)))
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
-    current_datetime_display = datetime.now().strftime("%d/%m/%Y %I:%M %p")
+    current_datetime_display = report_date or datetime.now().strftime("%d/%m/%Y %I:%M %p")
 
     # ----------------------------------------------
     # 🧾 Patient Info Box (Original layout maintained)
     # ----------------------------------------------
+    qr_reader = ImageReader(io.BytesIO(qr_png))
+
     def draw_patient_info(y_start):
         title_font = "Helvetica-Bold"
         value_font = "Helvetica"
@@ -187,102 +201,201 @@ def generate_report_pdf_without_letterhead(
         c.setFont(value_font, 8); c.drawString(value_x, y, patient_data.get("doctor", ""))
 
         qr_size = 60
-        qr_reader = ImageReader(qr_img_path)
         qr_x = box_x + box_width - qr_size - 6
         qr_y = box_y - (box_height / 2) - (qr_size / 2) + 8
         c.drawImage(qr_reader, qr_x, qr_y, width=qr_size, height=qr_size)
         return box_y - box_height - 10
 
+    # Patient box ek da Form XObject madhe; pratyek page var fakt doForm
+    c.beginForm("patient_box")
     y = draw_patient_info(height - 45)
+    c.endForm()
+    c.doForm("patient_box")
+
+    def new_page():
+        c.showPage()
+        c.doForm("patient_box")
+        return y
 
     # ----------------------------------------------
-    # 🧪 Test Results (Original logic kept)
+    # 🧪 Test Results
     # ----------------------------------------------
     if isinstance(selected_tests, dict):
         selected_tests = list(selected_tests.keys())
+    # Compact results: save zalelya catalog snapshot chya definitions
+    test_data = result_codec.test_defs_for(patient_data, test_data)
     tests_order = patient_data.get("tests", []) or selected_tests or list(test_data.keys())
-    printed_test_count = 0
+    result_index = ResultKeyIndex(results)  # ek da build, lookups O(1)
+    descriptions = descriptions or {}
+    sections = []
 
     for test in tests_order:
         # fetching test metadata
-        test_info = test_data.get(test) or db.reference(f"tests/{test}").get() or {}
+        test_info = test_data.get(test) or catalog.get_test(test) or {}
         sub_defs = test_info.get("subtests", [])
+        normals = ranges.compile_test(test, test_info)
         ordered_subtests = []
 
         for s in sub_defs:
             sub_name = s.get("name", "")
-            rk = find_result_key(results, test, sub_name)
-            res = results.get(rk, {}) if rk else None
+            rk = result_index.find(test, sub_name)
+            res = results.get(rk) if rk else None
+            unit, rng = result_codec.meta_of(res, s)
             ordered_subtests.append({
                 "sub_test": sub_name,
-                "value": res.get("value","") if res else "",
-                "unit": res.get("unit","") if res else s.get("unit",""),
-                "range": res.get("range","") if res else s.get("range","")
+                "kind": "group" if s.get("sub_params") else "item",
+                "value": result_codec.value_of(res),
+                "unit": unit,
+                "range": rng,
+                "normal": normals.get((sub_name, None)) if rng == s.get("range", "") else None
             })
             for p in s.get("sub_params", []):
                 pname = p.get("name")
-                rk = find_result_key(results, test, sub_name, pname)
-                pres = results.get(rk, {}) if rk else None
+                rk = result_index.find(test, sub_name, pname)
+                pres = results.get(rk) if rk else None
+                unit, rng = result_codec.meta_of(pres, p)
                 ordered_subtests.append({
                     "sub_test": pname,
-                    "value": pres.get("value","") if pres else "",
-                    "unit": pres.get("unit","") if pres else p.get("unit",""),
-                    "range": pres.get("range","") if pres else p.get("range","")
+                    "kind": "param",
+                    "value": result_codec.value_of(pres),
+                    "unit": unit,
+                    "range": rng,
+                    "normal": normals.get((sub_name, pname)) if rng == p.get("range", "") else None
                 })
-        # Layout + color + pagebreak logic remains fully unchanged
+
+        category = result_codec.value_of(results.get(f"category_{test}"))
+        description = descriptions.get(test) or results.get(f"{test}::description", "")
+        sections.append((test, category, ordered_subtests, description if isinstance(description, str) else ""))
+
+    # H / L flags - sagle rows ekach NumPy pass madhe
+    all_rows = [r for _, _, rows, _ in sections for r in rows]
+    for r, code in zip(all_rows, ranges.flag_rows(all_rows, patient_data.get("gender"))):
+        r["flag"] = ranges.FLAG_LABELS[code]
+
+    # Measure ek da, mag paginate + draw (repeated headers)
+    draw_results(c, build_blocks(sections), y, new_page)
 
     c.save()
-    print(f"✅ Temp PDF saved at: {output_path}")
-    return output_file, qr_img_path
+    return buffer.getvalue()
+
+
+def render_report(
+    patient_data, results, selected_tests, test_data,
+    descriptions=None, letterhead_path=None, report_date=None, qr_png=None, output_path=None
+):
+    """Single-pass render: report + optional letterhead overlay, all in memory.
+
+    Returns PDF bytes; writes them to ``output_path`` only when one is given.
+    """
+    pdf_bytes = render_report_bytes(
+        patient_data, results, selected_tests, test_data,
+        descriptions=descriptions, report_date=report_date, qr_png=qr_png
+    )
+    if letterhead_path:
+        pdf_bytes = merge_letterhead_bytes(letterhead_path, pdf_bytes)
+    if output_path:
+        with open(output_path, "wb") as f:
+            f.write(pdf_bytes)
+    return pdf_bytes
+
+
+def report_artifact_key(patient_data, results, selected_tests, test_data, descriptions=None, letterhead_path=None):
+    """Content hash of a report's inputs (artifact_store key).
+
+    PDF madhe aajchi date (Date row, QR filename) aahe - mhanun key madhe report
+    day pan; dusrya divshi generate kela tar navin PDF.
+    """
+    if isinstance(selected_tests, dict):
+        selected_tests = list(selected_tests.keys())
+    test_data = result_codec.test_defs_for(patient_data, test_data)
+    tests = patient_data.get("tests", []) or selected_tests or list(test_data.keys())
+    test_defs = {t: test_data.get(t) or catalog.get_test(t) for t in tests}
+    letterhead_version = get_letterhead_template(letterhead_path).digest if letterhead_path else None
+    report_day = datetime.now().strftime("%d%m%Y")
+    return artifact_store.artifact_key(patient_data, results, test_defs, letterhead_version, descriptions, report_day)
+
+
+def render_report_cached(
+    patient_data, results, selected_tests, test_data,
+    descriptions=None, letterhead_path=None, report_date=None
+):
+    """render_report through the artifact store -> (persistent path, pdf bytes, reused).
+
+    Same inputs + same divas asel tar juna PDF parat (tyat tya render chi
+    Reported On vel), navin render nahi.
+    """
+    key = report_artifact_key(patient_data, results, selected_tests, test_data, descriptions, letterhead_path)
+    path = artifact_store.get(key)
+    if path:
+        try:
+            return path, artifact_store.read(path), True
+        except OSError:
+            pass  # gc ne madhech kadhli
+    pdf_bytes = render_report(
+        patient_data, results, selected_tests, test_data,
+        descriptions=descriptions, letterhead_path=letterhead_path, report_date=report_date
+    )
+    return artifact_store.put(key, pdf_bytes), pdf_bytes, False
+
+
+def mark_report_generated(patient_id, pdf_path, reported_on):
+    try:
+        db.reference(f"patients/{patient_id}").update({
+            "report_generated": True,
+            "pdf_path": pdf_path,
+            "reported_on": reported_on
+        })
+    except Exception as e:
+        print("Firebase update failed:", e)
+
 
 # ----------------------------
-# PDF WITH LETTERHEAD
+# PDF WITHOUT LETTERHEAD
 # ----------------------------
-def generate_report_pdf_with_letterhead(letterhead_path, patient_data, results, selected_tests, test_data, descriptions=None):
-    # ✅ Cloud-friendly temp folder
+def generate_report_pdf_without_letterhead(
+    patient_data, results, selected_tests, test_data,
+    descriptions=None, output_path=None, report_date=None, qr_img_path=None
+):
     # SAFE TEMP DIRECTORY (Windows + Cloud)
-    # Universal tmp folder
     tmp_dir = tempfile.gettempdir()
-    
-    # Example: 'C:\\Users\\hp\\AppData\\Local\\Temp'
     os.makedirs(tmp_dir, exist_ok=True)
 
-    report_date = datetime.now()
-    current_date_file = report_date.strftime("%d%m%Y")
-    current_date_display = report_date.strftime("%d/%m/%Y %I:%M %p")
+    pdf_filename = report_filename(patient_data)
+    output_file = output_path or os.path.join(tmp_dir, pdf_filename)
 
-    safe_name = patient_data["name"].replace(" ", "_")
-    unique_id = patient_data.get("id", "0000")
-    pdf_filename = f"{unique_id}_{safe_name}_{current_date_file}_Report.pdf"
-    final_report_path = os.path.join(tmp_dir, pdf_filename)
+    github_pdf_link = report_qr_link(pdf_filename)
+    qr_png = make_qr_png(github_pdf_link)
+    print(f"✅ QR Code generated for link: {github_pdf_link}")
 
-    temp_report_path = os.path.join(tmp_dir, f"temp_{pdf_filename}")
-    generate_report_pdf_without_letterhead(
+    render_report(
         patient_data, results, selected_tests, test_data,
-        output_path=temp_report_path,
-        report_date=current_date_display
+        descriptions=descriptions, report_date=report_date, qr_png=qr_png, output_path=output_file
     )
+    # QR PNG disk var fakt caller ne path dila tar
+    if qr_img_path:
+        qr_codes.save_qr(github_pdf_link, qr_img_path)
+    print(f"✅ PDF saved at: {output_file}")
+    return output_file, qr_img_path
 
-    # Merge with letterhead
-    merge_with_letterhead(letterhead_path, temp_report_path, final_report_path)
+# ----------------------------
+# PDF WITH LETTERHEAD
+# ----------------------------
+def generate_report_pdf_with_letterhead(letterhead_path, patient_data, results, selected_tests, test_data, descriptions=None):
+    current_date_display = datetime.now().strftime("%d/%m/%Y %I:%M %p")
 
-    # QR code
-    qr_img_path = os.path.join(tmp_dir, f"qr_{unique_id}.png")
-    github_username = "developmentof1"
-    repo_name = "AarogyamLabReports"
-    github_pdf_link = f"https://raw.githubusercontent.com/{github_username}/{repo_name}/main/{os.path.basename(final_report_path)}"
-    qrcode.make(github_pdf_link).save(qr_img_path)
+    # Report + letterhead ek pass madhe; persistent artifact store madhe (restart nantar pan)
+    final_report_path, _, reused = render_report_cached(
+        patient_data, results, selected_tests, test_data,
+        descriptions=descriptions, letterhead_path=letterhead_path, report_date=current_date_display
+    )
+    if reused:
+        print(f"✅ Report unchanged, reusing {final_report_path}")
+        # Juna PDF madhe adhicha Reported On - Firebase madhe toch thevto
+        current_date_display = patient_data.get("reported_on") or current_date_display
+    qr_img_path = None
 
     # Update Firebase
-    try:
-        patient_ref = db.reference(f"patients/{patient_data.get('id','unknown')}")
-        patient_ref.update({
-            "report_generated": True,
-            "pdf_path": final_report_path,
-            "reported_on": current_date_display
-        })
-    except Exception as e:
-        print("Firebase update failed:", e)
+    mark_report_generated(patient_data.get("id", "unknown"), final_report_path, current_date_display)
 
     # Open PDF (optional in cloud, can skip)
     try:
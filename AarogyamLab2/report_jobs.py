@@ -0,0 +1,167 @@
+import os
+import uuid
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import db
+
+import catalog
+import local_mirror
+from report_generator import render_report_cached, mark_report_generated, DEFAULT_LETTERHEAD
+
+# ----------------------------
+# REPORT JOB QUEUE
+# ----------------------------
+# Page job submit karto ani lagech job id gheto; rendering background worker
+# threads madhe. Job table SQLite madhe - app restart zala tari queued/running
+# jobs punha chalu hotat.
+
+JOBS_DB_PATH = os.environ.get(
+    "AAROGYAM_JOBS_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_jobs.db")
+)
+LETTERHEAD_PATH = DEFAULT_LETTERHEAD
+REPORT_JOB_WORKERS = int(os.environ.get("AAROGYAM_REPORT_WORKERS", "2"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_jobs(
+    id TEXT PRIMARY KEY,
+    patient_id TEXT,
+    letterhead INTEGER,
+    status TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    output_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs(status);
+"""
+
+_lock = threading.Lock()
+_conn = None
+_pool = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(JOBS_DB_PATH, check_same_thread=False)
+        _conn.row_factory = sqlite3.Row
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _set(job_id, **fields):
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with _lock:
+        conn = _db()
+        conn.execute(f"UPDATE report_jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+
+
+def _get_pool():
+    """Worker pool lazily; pahilya veli adhiche adkalele jobs resume."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            return _pool
+        _pool = ThreadPoolExecutor(max_workers=REPORT_JOB_WORKERS, thread_name_prefix="report-job")
+        conn = _db()
+        pending = conn.execute(
+            "SELECT id FROM report_jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+        ).fetchall()
+        conn.execute("UPDATE report_jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+        conn.commit()
+    for row in pending:
+        _pool.submit(_run_job, row["id"])
+    return _pool
+
+
+# ----------------------------
+# WORKER
+# ----------------------------
+def _load_patient(patient_id):
+    if local_mirror.ready("patients"):
+        return local_mirror.get_patient(patient_id)
+    pdata = db.reference(f"patients/{patient_id}").get()
+    if pdata:
+        pdata["id"] = patient_id
+    return pdata
+
+
+def _claim(job_id):
+    """QUEUED -> RUNNING atomically; dusrya worker ne aadhich ghetla asel tar False."""
+    with _lock:
+        conn = _db()
+        cur = conn.execute(
+            "UPDATE report_jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+            (RUNNING, _now(), job_id, QUEUED)
+        )
+        conn.commit()
+        return cur.rowcount == 1
+
+
+def _run_job(job_id):
+    if not _claim(job_id):
+        return
+    job = get_job(job_id)
+    try:
+        patient = _load_patient(job["patient_id"])
+        if not patient:
+            raise ValueError(f"Patient {job['patient_id']} not found")
+        reported_on = datetime.now().strftime("%d/%m/%Y %I:%M %p")
+        # Artifact store: inputs same asel tar adhicha PDF, nahi tar render + store
+        output_path, _, reused = render_report_cached(
+            patient, patient.get("results", {}) or {}, patient.get("tests", []), catalog.get_tests(),
+            letterhead_path=LETTERHEAD_PATH if job["letterhead"] else None, report_date=reported_on
+        )
+        if reused:
+            reported_on = patient.get("reported_on") or reported_on  # PDF madhe juna vel
+        if job["letterhead"]:
+            mark_report_generated(job["patient_id"], output_path, reported_on)
+        _set(job_id, status=DONE, finished_at=_now(), output_path=output_path)
+    except Exception as e:
+        print(f"❌ Report job {job_id} failed: {e}")
+        _set(job_id, status=FAILED, finished_at=_now(), error=f"{type(e).__name__}: {e}")
+
+
+# ----------------------------
+# PUBLIC API
+# ----------------------------
+def submit_report_job(patient_id, letterhead=True):
+    """Queue a report; returns the job id immediately."""
+    pool = _get_pool()  # adhiche adkalele jobs aadhi resume - navin job tyat nahi
+    job_id = uuid.uuid4().hex
+    with _lock:
+        conn = _db()
+        conn.execute(
+            "INSERT INTO report_jobs(id, patient_id, letterhead, status, created_at) VALUES (?,?,?,?,?)",
+            (job_id, patient_id, 1 if letterhead else 0, QUEUED, _now())
+        )
+        conn.commit()
+    pool.submit(_run_job, job_id)
+    return job_id
+
+
+def get_job(job_id):
+    with _lock:
+        row = _db().execute("SELECT * FROM report_jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def read_output(job):
+    """Done job chya PDF che bytes (download sathi)."""
+    if job and job["status"] == DONE and job["output_path"] and os.path.exists(job["output_path"]):
+        with open(job["output_path"], "rb") as f:
+            return f.read()
+    return None
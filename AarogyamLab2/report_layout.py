@@ -0,0 +1,208 @@
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph
+
+# ----------------------------
+# RESULTS TABLE LAYOUT ENGINE
+# ----------------------------
+# Don passes: build_blocks() sagle rows ek da measure karto (wrap + height),
+# draw_results() fakt y kami karat drawString karto ani page bharla ki
+# showPage + header punha. Styles / metrics module level la ek da.
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 8
+TITLE_SIZE = 9
+HEADER_SIZE = 8
+LEADING = 10
+ROW_PAD = 3
+
+# (header, x, width)
+COLUMNS = (
+    ("TEST DESCRIPTION", 50, 195),
+    ("RESULT", 250, 85),
+    ("UNIT", 340, 75),
+    ("REFERENCE RANGE", 420, 140),
+)
+TABLE_LEFT, TABLE_RIGHT = 45, 560
+PARAM_INDENT = 10
+# Letterhead footer + signature yachya var thambto
+BOTTOM_MARGIN = 160
+
+# ranges.FLAG_LABELS pramane
+FLAG_COLORS = {"H": colors.HexColor("#C0392B"), "L": colors.HexColor("#1F5FAD")}
+BLACK = colors.black
+
+NOTE_STYLE = ParagraphStyle("report_note", fontName=FONT, fontSize=FONT_SIZE, leading=LEADING)
+NOTE_LABEL = "Remarks: "
+
+
+# ----------------------------
+# METRICS
+# ----------------------------
+@lru_cache(maxsize=8192)
+def text_width(text, font, size):
+    return stringWidth(text, font, size)
+
+
+@lru_cache(maxsize=4096)
+def wrap_text(text, width, font=FONT, size=FONT_SIZE):
+    """Greedy word wrap -> tuple of lines (cached; same labels repeat across reports)."""
+    text = str(text or "").strip()
+    if not text or text_width(text, font, size) <= width:
+        return (text,)
+    space = text_width(" ", font, size)
+    lines, line, line_w = [], [], 0.0
+    for word in text.split():
+        w = text_width(word, font, size)
+        if line and line_w + space + w > width:
+            lines.append(" ".join(line))
+            line, line_w = [word], w
+        else:
+            line_w += (space if line else 0) + w
+            line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return tuple(lines)
+
+
+# ----------------------------
+# ROWS
+# ----------------------------
+class LayoutRow:
+    __slots__ = ("kind", "cells", "height", "flag", "note")
+
+    def __init__(self, kind, cells=(), height=0.0, flag="", note=None):
+        self.kind = kind      # "category" | "title" | "group" | "item" | "param" | "note"
+        self.cells = cells    # per column tuple of wrapped lines
+        self.height = height
+        self.flag = flag
+        self.note = note      # wrapped Paragraph for remarks
+
+
+def _measure_row(kind, name, value, unit, rng, flag):
+    indent = PARAM_INDENT if kind == "param" else 0
+    name_font = FONT_BOLD if kind == "group" else FONT
+    value_text = f"{value} {flag}".strip() if flag else str(value or "")
+    cells = (
+        wrap_text(str(name or ""), COLUMNS[0][2] - indent, name_font),
+        wrap_text(value_text, COLUMNS[1][2], FONT_BOLD if flag else FONT),
+        wrap_text(str(unit or ""), COLUMNS[2][2]),
+        wrap_text(str(rng or ""), COLUMNS[3][2]),
+    )
+    lines = max(len(c) for c in cells)
+    return LayoutRow(kind, cells, lines * LEADING + ROW_PAD, flag)
+
+
+def build_blocks(sections):
+    """sections: [(test, category, rows, description)] -> list of row blocks (one per test).
+
+    ``rows`` are the report_generator dicts (sub_test/value/unit/range/kind/flag);
+    ``flag`` is precomputed by ranges.flag_rows().
+    """
+    blocks = []
+    last_category = None
+    note_width = TABLE_RIGHT - COLUMNS[0][1]
+    for test, category, rows, description in sections:
+        block = []
+        if category and category != last_category:
+            block.append(LayoutRow("category", (wrap_text(category.upper(), note_width, FONT_BOLD, TITLE_SIZE),),
+                                   LEADING + 2 * ROW_PAD))
+            last_category = category
+        block.append(LayoutRow("title", (wrap_text(test, note_width, FONT_BOLD, TITLE_SIZE),),
+                               LEADING + 2 * ROW_PAD))
+        for r in rows:
+            block.append(_measure_row(r.get("kind", "item"), r["sub_test"], r["value"], r["unit"], r["range"], r.get("flag", "")))
+        if description:
+            para = Paragraph(f"<b>{NOTE_LABEL}</b>{_escape(description)}", NOTE_STYLE)
+            _, h = para.wrap(note_width, 10000)
+            block.append(LayoutRow("note", height=h + 2 * ROW_PAD, note=para))
+        blocks.append(block)
+    return blocks
+
+
+def _escape(text):
+    return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br/>")
+
+
+# ----------------------------
+# DRAW
+# ----------------------------
+HEADER_HEIGHT = LEADING + 2 * ROW_PAD
+
+
+def _draw_header(c, y):
+    c.setStrokeColor(BLACK)
+    c.setLineWidth(0.6)
+    c.line(TABLE_LEFT, y, TABLE_RIGHT, y)
+    c.setFont(FONT_BOLD, HEADER_SIZE)
+    base = y - LEADING
+    for title, x, _ in COLUMNS:
+        c.drawString(x, base, title)
+    y -= HEADER_HEIGHT
+    c.line(TABLE_LEFT, y, TABLE_RIGHT, y)
+    return y - ROW_PAD
+
+
+def _draw_row(c, row, y):
+    if row.kind == "note":
+        row.note.drawOn(c, COLUMNS[0][1], y - row.height + ROW_PAD)
+        return
+    base = y - LEADING + 2
+    if row.kind in ("category", "title"):
+        c.setFont(FONT_BOLD, TITLE_SIZE)
+        line = row.cells[0][0]
+        if row.kind == "category":
+            c.drawCentredString((TABLE_LEFT + TABLE_RIGHT) / 2, base - ROW_PAD, line)
+        else:
+            c.drawString(COLUMNS[0][1], base - ROW_PAD, line)
+            c.line(COLUMNS[0][1], base - ROW_PAD - 2, COLUMNS[0][1] + text_width(line, FONT_BOLD, TITLE_SIZE), base - ROW_PAD - 2)
+        return
+
+    indent = PARAM_INDENT if row.kind == "param" else 0
+    for col, lines in enumerate(row.cells):
+        x = COLUMNS[col][1] + (indent if col == 0 else 0)
+        if col == 0:
+            c.setFont(FONT_BOLD if row.kind == "group" else FONT, FONT_SIZE)
+        elif col == 1 and row.flag:
+            c.setFont(FONT_BOLD, FONT_SIZE)
+            c.setFillColor(FLAG_COLORS.get(row.flag, BLACK))
+        else:
+            c.setFont(FONT, FONT_SIZE)
+        ly = base
+        for line in lines:
+            c.drawString(x, ly, line)
+            ly -= LEADING
+        if col == 1 and row.flag:
+            c.setFillColor(BLACK)
+
+
+def draw_results(c, blocks, y, new_page, bottom=BOTTOM_MARGIN):
+    """Draw measured blocks from ``y`` down, paginating with repeated headers.
+
+    ``new_page()`` must call ``c.showPage()``, redraw the page furniture
+    (patient box) and return the y where the table may start.
+    Returns the final y.
+    """
+    if not blocks:
+        return y
+    y = _draw_header(c, y)
+    for block in blocks:
+        # Title + pahila row ekatra (orphan heading nako)
+        lead = 0
+        for row in block:
+            lead += row.height
+            if row.kind not in ("category", "title"):
+                break
+        if y - lead < bottom:
+            y = _draw_header(c, new_page())
+        for row in block:
+            if y - row.height < bottom:
+                y = _draw_header(c, new_page())
+            _draw_row(c, row, y)
+            y -= row.height
+        y -= ROW_PAD
+    return y
@@ -0,0 +1,54 @@
+import catalog
+
+# ----------------------------
+# RESULTS ENCODING
+# ----------------------------
+# Compact format: results/{key} = fakt value (string), ani patient var
+# "catalog_version" - unit / range / naav catalog_snapshots/{version} madhun.
+# Juna (legacy) format: results/{key} = {"value", "unit", "range", "original_name"}.
+# Reader doghe samjto; ek record madhe mix asla tari chalto.
+
+CATALOG_VERSION_FIELD = "catalog_version"
+
+
+def value_of(entry):
+    """Result value as a string, whichever format ``entry`` is in."""
+    if isinstance(entry, dict):
+        value = entry.get("value", "")
+    else:
+        value = entry
+    return "" if value is None else str(value)
+
+
+def is_compact(entry):
+    return entry is not None and not isinstance(entry, dict)
+
+
+def encode(value):
+    """Compact entry to store (None = nothing to store)."""
+    value = "" if value is None else str(value).strip()
+    return value or None
+
+
+def test_defs_for(patient_data, test_data=None):
+    """Test definitions a report for this patient must use.
+
+    Compact results -> the catalog snapshot they were saved against; legacy or
+    missing snapshot -> ``test_data`` / current catalog.
+    """
+    version = (patient_data or {}).get(CATALOG_VERSION_FIELD)
+    if version is not None:
+        snapshot = catalog.get_snapshot(version)
+        if snapshot:
+            return snapshot
+    return test_data if test_data is not None else catalog.get_tests()
+
+
+def meta_of(entry, definition):
+    """(unit, range) - legacy entry madhli, nahi tar definition (snapshot) madhli."""
+    definition = definition or {}
+    unit = rng = None
+    if isinstance(entry, dict):
+        unit, rng = entry.get("unit"), entry.get("range")
+    return unit or definition.get("unit", ""), rng or definition.get("range", "")
+
@@ -0,0 +1,159 @@
+import os
+import re
+import math
+
+from firebase_admin import db
+
+import archive
+import firebase_app
+import patient_search
+import result_codec
+from ranges import to_number
+from result_keys import canonical
+
+# ----------------------------
+# LONGITUDINAL RESULTS
+# ----------------------------
+# Patient id "naav + timestamp" aahe - ekach vyakti chya visits vegveglya records.
+# Identity = phone (shevatche 10 ankde) + normalized naav:
+#   identities/{identity}/{pid}: registered_key
+#   result_series/{identity}/{canonical result key}/{pid}: {"t": registered_key, "v": number}
+# Ek vyakti cha purna itihas = don chhote nodes (get_many) - patients scan nahi.
+# Phone nasel tar identity nahi (fakt naav ne vegvegle lok ekatra hotil).
+
+IDENTITIES_PATH = "identities"
+SERIES_PATH = "result_series"
+# |navin - magil| / |magil| hyapeksha jast -> value entry madhe delta warning
+DELTA_THRESHOLD = float(os.environ.get("AAROGYAM_DELTA_THRESHOLD", "0.5"))
+MIN_PHONE_DIGITS = 10
+
+_TITLES = {"mr", "mrs", "miss", "ms", "master", "smt", "shri", "dr", "baby"}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name):
+    """'Mr. Ram  Patil' -> 'ram_patil' (title, case, punctuation ignore)."""
+    words = _NON_ALNUM.sub(" ", (name or "").lower()).split()
+    if words and words[0] in _TITLES:
+        words = words[1:]
+    return "_".join(words)
+
+
+def identity_key(pdata):
+    """'9876543210_ram_patil', or None without a usable phone / name."""
+    if not pdata:
+        return None
+    phone = re.sub(r"\D", "", str(pdata.get("phone") or ""))[-10:]
+    name = normalize_name(pdata.get("name"))
+    if len(phone) < MIN_PHONE_DIGITS or not name:
+        return None
+    return f"{phone}_{name}"
+
+
+def _registered_key(pdata):
+    return pdata.get("registered_key") or patient_search.registered_key(pdata.get("registered_on", ""))
+
+
+def _is_numeric_key(key):
+    return "::" in key and not key.endswith("::description")
+
+
+def _point(pdata, value):
+    v = to_number(result_codec.value_of(value))
+    return {"t": _registered_key(pdata), "v": v} if math.isfinite(v) else None
+
+
+# ----------------------------
+# WRITE (save barobar multi-path update madhe)
+# ----------------------------
+def series_updates(pid, pdata, results, identity=None):
+    """Root paths for ``results`` ({key: value or None}) of one patient visit."""
+    identity = identity or identity_key(pdata)
+    if not identity:
+        return {}
+    updates = {f"{IDENTITIES_PATH}/{identity}/{pid}": _registered_key(pdata)}
+    for key, value in (results or {}).items():
+        if _is_numeric_key(key):
+            updates[f"{SERIES_PATH}/{identity}/{canonical(key)}/{pid}"] = _point(pdata, value)
+    return updates
+
+
+def identity_updates(pid, pdata, old=None):
+    """Patient save (new / edit). Phone / naav / date badalli tar points punha lihito."""
+    new_id, old_id = identity_key(pdata), identity_key(old)
+    updates = {}
+    if old_id and old_id != new_id:
+        updates[f"{IDENTITIES_PATH}/{old_id}/{pid}"] = None
+        for key in (old.get("results") or {}):
+            if _is_numeric_key(key):
+                updates[f"{SERIES_PATH}/{old_id}/{canonical(key)}/{pid}"] = None
+    if new_id:
+        moved = old and (old_id != new_id or _registered_key(old) != _registered_key(pdata))
+        results = old.get("results") if moved else None
+        updates.update(series_updates(pid, pdata, results, identity=new_id))
+    return updates
+
+
+# ----------------------------
+# READ
+# ----------------------------
+def get_history(pdata):
+    """{canonical key: [(registered_key, value, pid), ...] oldest first} for this person."""
+    identity = identity_key(pdata)
+    if not identity:
+        return {}
+    paths = (f"{IDENTITIES_PATH}/{identity}", f"{SERIES_PATH}/{identity}")
+    nodes = firebase_app.get_many(paths)
+    visits = nodes[paths[0]] or {}
+    history = {}
+    for key, points in (nodes[paths[1]] or {}).items():
+        if not isinstance(points, dict):
+            continue
+        rows = sorted((p["t"], p["v"], pid) for pid, p in points.items()
+                      if pid in visits and isinstance(p, dict) and "v" in p and p.get("t"))
+        if rows:
+            history[key] = rows
+    return history
+
+
+def previous(history, key, pdata, pid):
+    """(registered_key, value) of this person's latest visit before ``pdata``, or None."""
+    before = _registered_key(pdata)
+    earlier = [(t, v) for t, v, p in history.get(canonical(key), []) if t < before and p != pid]
+    return earlier[-1] if earlier else None
+
+
+def delta(value, prev_value):
+    """Relative change of ``value`` vs ``prev_value`` (None if not comparable)."""
+    v = to_number(value)
+    if not math.isfinite(v) or not prev_value:
+        return None
+    return (v - prev_value) / abs(prev_value)
+
+
+def is_large_delta(change, threshold=DELTA_THRESHOLD):
+    return change is not None and abs(change) >= threshold
+
+
+# ----------------------------
+# BACKFILL (juna data sathi ek da)
+# ----------------------------
+def backfill():
+    """Existing (hot + archived) patients var identities + result_series lihito."""
+    patients = db.reference(patient_search.PATIENTS_PATH).get() or {}
+    rows = [(pid, p) for pid, p in patients.items() if isinstance(p, dict)]
+    rows += [(p["id"], p) for p in archive.iter_patients()]
+    updates = {}
+    linked = 0
+    for pid, pdata in rows:
+        paths = series_updates(pid, pdata, pdata.get("results"))
+        linked += bool(paths)
+        updates.update((k, v) for k, v in paths.items() if v is not None)
+    firebase_app.update_many(updates)
+    print(f"✅ Linked {linked} of {len(rows)} patients to an identity ({len(updates)} paths)")
+    return linked
+
+
+if __name__ == "__main__":
+    firebase_app.init_app()
+    backfill()
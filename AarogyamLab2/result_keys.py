@@ -0,0 +1,87 @@
+import re
+
+# ----------------------------
+# RESULT KEY SCHEME
+# ----------------------------
+# Results "Test::Sub" kiva "Test::Sub::Param" keys var save hotat. Sub/param naav
+# make_key_safe() ne Firebase-safe kele jatat - value_entry ani report_generator
+# doghe hech functions vaprtat.
+
+_UNSAFE = re.compile(r'[^a-zA-Z0-9_]')
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def make_key_safe(name: str) -> str:
+    """Firebase-safe key (replace invalid chars)"""
+    return _UNSAFE.sub('_', name)
+
+
+def result_key(test, sub, param=None):
+    """Canonical key under which value_entry saves a result."""
+    if param:
+        return f"{test}::{make_key_safe(sub)}::{make_key_safe(param)}"
+    return f"{test}::{make_key_safe(sub)}"
+
+
+def normalize(x: str):
+    return (x.replace(" ", "_").replace("-", "_").replace("(", "_")
+            .replace(")", "_").replace(".", "_").replace("/", "_").replace("__", "_"))
+
+
+def canonical(key: str) -> str:
+    """Separator-insensitive form: 'CBC::W.B.C_(Total)' -> 'cbc_w_b_c_total'."""
+    return _NON_ALNUM.sub('_', key.lower()).strip('_')
+
+
+# ----------------------------
+# RESULT KEY INDEX
+# ----------------------------
+class ResultKeyIndex:
+    """Lookup table built once per results dict.
+
+    Order of matching is the same as the old find_result_key scans:
+    exact key variants, then a separator-insensitive match (covers the
+    ``Sub::Param`` / ``Sub_Param`` / trailing ``_`` variants in O(1)), and
+    only on a miss the legacy substring ("fuzzy") match.
+    """
+
+    def __init__(self, results):
+        self.results = results or {}
+        self._canonical = {}
+        for key in self.results:
+            self._canonical.setdefault(canonical(key), key)
+        self._fuzzy = None
+
+    def _fuzzy_keys(self):
+        if self._fuzzy is None:
+            self._fuzzy = [(normalize(key.lower()), key, key.count("::") > 1) for key in self.results]
+        return self._fuzzy
+
+    def find(self, test, sub, param=None, fuzzy=True):
+        results = self.results
+        if param:
+            exact = (f"{test}::{sub}::{param}", result_key(test, sub, param))
+            wanted = f"{test}::{sub}::{param}"
+        else:
+            exact = (f"{test}::{sub}", result_key(test, sub))
+            wanted = f"{test}::{sub}"
+
+        for key in exact:
+            if key in results:
+                return key
+        key = self._canonical.get(canonical(wanted))
+        if key is not None or not fuzzy:
+            return key
+
+        sub_clean = normalize(sub.lower())
+        param_clean = normalize(param.lower()) if param else None
+        for k_clean, key, is_param in self._fuzzy_keys():
+            if param_clean is None and is_param:
+                continue  # sub-test lookup nako tyachya sub-param chi value
+            if sub_clean in k_clean and (param_clean is None or param_clean in k_clean):
+                return key
+        return None
+
+    def get(self, test, sub, param=None, fuzzy=True):
+        key = self.find(test, sub, param, fuzzy=fuzzy)
+        return self.results.get(key) if key else None
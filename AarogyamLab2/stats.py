@@ -0,0 +1,167 @@
+import time
+import threading
+from datetime import date, timedelta
+
+from firebase_admin import db
+
+import archive
+import firebase_app
+import patient_search
+
+# ----------------------------
+# DASHBOARD AGGREGATES
+# ----------------------------
+# Dashboard sathi purna "patients" tree scan nahi. Patient save zala ki chhote
+# counters transaction ne update hotat:
+#   stats/daily/{YYYY-MM-DD}: {patients, tests, revenue}
+#   stats/monthly/{YYYY-MM}:  {patients, tests, revenue}
+#   stats/totals:             {patients, tests, revenue}
+# Dashboard fakt he nodes vachto - history kitihi moti asli tari same vel.
+
+STATS_PATH = "stats"
+FIELDS = ("patients", "tests", "revenue")
+DASHBOARD_TTL = 30  # seconds
+ROLLUP_DAYS = 30
+ROLLUP_MONTHS = 12
+
+_lock = threading.Lock()
+_cache = {"data": None, "loaded_at": 0.0}
+
+
+def _to_number(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def patient_day(pdata):
+    """'YYYY-MM-DD' of registration (registered_key, nahi tar registered_on parse)."""
+    key = pdata.get("registered_key") or patient_search.registered_key(pdata.get("registered_on", ""))
+    return key[:10]
+
+
+def patient_counts(pdata):
+    return {
+        "patients": 1,
+        "tests": len(pdata.get("tests") or []),
+        "revenue": _to_number(pdata.get("total_bill")),
+    }
+
+
+def _add_counts(delta):
+    def txn(current):
+        current = dict(current or {})
+        for k, v in delta.items():
+            current[k] = (current.get(k) or 0) + v
+        return current
+    return txn
+
+
+def _bucket_deltas(old, new):
+    """{day: delta} - navin patient, edit, kiva registration date badalli tari barobar."""
+    deltas = {}
+    for pdata, sign in ((old, -1), (new, 1)):
+        if not pdata:
+            continue
+        day = patient_day(pdata)
+        if not day:
+            continue
+        bucket = deltas.setdefault(day, dict.fromkeys(FIELDS, 0))
+        for k, v in patient_counts(pdata).items():
+            bucket[k] += sign * v
+    return {day: d for day, d in deltas.items() if any(d.values())}
+
+
+def record_patient(new, old=None):
+    """Patient save nantar counters update. ``old`` = edit adhicha data (navin patient la None)."""
+    deltas = _bucket_deltas(old, new)
+    if not deltas:
+        return
+    totals = dict.fromkeys(FIELDS, 0)
+    months = {}
+    for day, delta in deltas.items():
+        db.reference(f"{STATS_PATH}/daily/{day}").transaction(_add_counts(delta))
+        month = months.setdefault(day[:7], dict.fromkeys(FIELDS, 0))
+        for k, v in delta.items():
+            month[k] += v
+            totals[k] += v
+    for month, delta in months.items():
+        if any(delta.values()):
+            db.reference(f"{STATS_PATH}/monthly/{month}").transaction(_add_counts(delta))
+    if any(totals.values()):
+        db.reference(f"{STATS_PATH}/totals").transaction(_add_counts(totals))
+    invalidate()
+
+
+# ----------------------------
+# READ (dashboard)
+# ----------------------------
+def _row(key, counts):
+    counts = counts if isinstance(counts, dict) else {}
+    return {"period": key, **{k: counts.get(k, 0) for k in FIELDS}}
+
+
+def _rollup(kind, start):
+    rows = db.reference(f"{STATS_PATH}/{kind}").order_by_key().start_at(start).get() or {}
+    return [_row(k, v) for k, v in sorted(rows.items())]
+
+
+def get_dashboard(today=None, force=False):
+    """{"totals", "today", "month", "daily", "monthly"} - chhote nodes, TTL cache."""
+    today = today or date.today()
+    with _lock:
+        data = _cache["data"]
+        if (not force and data is not None and data["day"] == today.isoformat()
+                and time.monotonic() - _cache["loaded_at"] < DASHBOARD_TTL):
+            return data
+        day, month = today.isoformat(), today.strftime("%Y-%m")
+        first_month = today.replace(day=1)
+        for _ in range(ROLLUP_MONTHS - 1):
+            first_month = (first_month - timedelta(days=1)).replace(day=1)
+        paths = (f"{STATS_PATH}/totals", f"{STATS_PATH}/daily/{day}", f"{STATS_PATH}/monthly/{month}")
+        nodes = firebase_app.get_many(paths)
+        data = {
+            "day": day,
+            "totals": _row("total", nodes[paths[0]]),
+            "today": _row(day, nodes[paths[1]]),
+            "month": _row(month, nodes[paths[2]]),
+            "daily": _rollup("daily", (today - timedelta(days=ROLLUP_DAYS - 1)).isoformat()),
+            "monthly": _rollup("monthly", first_month.strftime("%Y-%m")),
+        }
+        _cache.update(data=data, loaded_at=time.monotonic())
+        return data
+
+
+def invalidate():
+    with _lock:
+        _cache["data"] = None
+
+
+# ----------------------------
+# REBUILD (juna data sathi ek da / counters chuklyas)
+# ----------------------------
+def rebuild_stats():
+    """Purna patients scan karun stats node punha lihito. Ek full read (+ local archive)."""
+    patients = list((db.reference("patients").get() or {}).values()) + list(archive.iter_patients())
+    daily, monthly, totals = {}, {}, dict.fromkeys(FIELDS, 0)
+    for pdata in patients:
+        if not isinstance(pdata, dict):
+            continue
+        day = patient_day(pdata)
+        if not day:
+            continue
+        for bucket in (daily.setdefault(day, dict.fromkeys(FIELDS, 0)),
+                       monthly.setdefault(day[:7], dict.fromkeys(FIELDS, 0)),
+                       totals):
+            for k, v in patient_counts(pdata).items():
+                bucket[k] += v
+    db.reference(STATS_PATH).set({"daily": daily, "monthly": monthly, "totals": totals})
+    invalidate()
+    print(f"✅ Stats rebuilt from {len(patients)} patients")
+    return totals
+
+
+if __name__ == "__main__":
+    firebase_app.init_app()
+    rebuild_stats()